@@ -1,48 +1,154 @@
 import os
-import torch
+import gc
+import threading
 import folder_paths
-from transformers import pipeline, AutoTokenizer, AutoModelForSeq2SeqLM
-from huggingface_hub import snapshot_download
+
+from wildpromptor_core import load_config
+from wildpromptor_core.cache import LRUCache
+from wildpromptor_core.instrument import count_prompts, logger, register_cache, span
 
 MODEL_PATH = os.path.join(folder_paths.models_dir, "LLM", "Prompt-Enhance")
-os.makedirs(MODEL_PATH, exist_ok=True)
+MODEL_CHECKPOINT = "1038lab/Prompt-Enhance"
 
-class WildPromptor_Enhancer:
-    def __init__(self):
-        self.device = "cuda" if torch.cuda.is_available() else "cpu"
-        self.model_checkpoint = "1038lab/Prompt-Enhance"
-        print(f"Using device: {self.device}")
-        
-        if not os.listdir(MODEL_PATH):
-            print(f"Downloading {self.model_checkpoint} model...")
+GENERATION_PARAMS = {"temperature": 0.7, "top_k": 50, "top_p": 0.95}
+
+# auto: CUDA when available, fp32 CPU otherwise. cpu: force fp32 CPU.
+# cpu-int8: CPU with the Linear layers dynamically quantized to int8.
+BACKENDS = ["auto", "cpu", "cpu-int8"]
+
+# Shared by all instances: (input text, seed, count, max length, sampling params) -> generated texts.
+_result_cache = LRUCache(256)
+register_cache("enhancer_results", _result_cache)
+
+class EnhancerLoadError(RuntimeError):
+    pass
+
+class EnhancerModelRegistry:
+    """Process-wide, lazily loaded Prompt-Enhance pipeline for one backend.
+
+    torch/transformers are only imported on the first ``acquire()``. With
+    ``idle_unload_seconds`` > 0 the model is dropped after that long without
+    use and transparently reloaded on the next call.
+    """
+
+    def __init__(self, backend="auto", idle_unload_seconds=0, warmup=False, interop_threads=0):
+        self.backend = backend
+        self.interop_threads = interop_threads
+        self.idle_unload_seconds = idle_unload_seconds
+        self.warmup = warmup
+        self.pipe = None
+        self.device = None
+        self._lock = threading.RLock()
+        self._in_use = 0
+        self._timer = None
+
+    def _download(self):
+        from huggingface_hub import snapshot_download
+
+        os.makedirs(MODEL_PATH, exist_ok=True)
+        if os.listdir(MODEL_PATH):
+            return
+        logger.info("Downloading %s model...", MODEL_CHECKPOINT)
+        try:
+            snapshot_download(
+                repo_id=MODEL_CHECKPOINT,
+                local_dir=MODEL_PATH,
+                local_dir_use_symlinks=False
+            )
+            logger.info("Model downloaded successfully!")
+        except Exception as e:
+            logger.error("Error downloading model: %s", e)
+            raise EnhancerLoadError(f"Failed to download model: {str(e)}")
+
+    def _load(self):
+        import torch
+        from transformers import pipeline, AutoTokenizer, AutoModelForSeq2SeqLM
+
+        self.device = "cuda" if self.backend == "auto" and torch.cuda.is_available() else "cpu"
+        logger.info("Using device: %s (%s)", self.device, self.backend)
+        if self.interop_threads:
             try:
-                snapshot_download(
-                    repo_id=self.model_checkpoint,
-                    local_dir=MODEL_PATH,
-                    local_dir_use_symlinks=False
-                )
-                print("Model downloaded successfully!")
-            except Exception as e:
-                print(f"Error downloading model: {str(e)}")
-                raise RuntimeError(f"Failed to download model: {str(e)}")
-        
+                torch.set_num_interop_threads(self.interop_threads)
+            except RuntimeError:
+                # Only allowed before the first inter-op parallel work in the process.
+                pass
+        self._download()
         try:
-            print("Loading model and tokenizer...")
-            self.tokenizer = AutoTokenizer.from_pretrained(MODEL_PATH)
-            self.model = AutoModelForSeq2SeqLM.from_pretrained(MODEL_PATH)
-            
+            logger.info("Loading model and tokenizer...")
+            tokenizer = AutoTokenizer.from_pretrained(MODEL_PATH)
+            model = AutoModelForSeq2SeqLM.from_pretrained(MODEL_PATH).eval()
+            if self.backend == "cpu-int8":
+                model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
             self.pipe = pipeline(
                 'text2text-generation',
-                model=self.model,
-                tokenizer=self.tokenizer,
+                model=model,
+                tokenizer=tokenizer,
                 repetition_penalty=1.2,
                 device=self.device
             )
-            print("Model loaded successfully!")
+            logger.info("Model loaded successfully!")
         except Exception as e:
-            print(f"Error loading model: {str(e)}")
-            raise RuntimeError(f"Failed to load model: {str(e)}")
-            
+            logger.error("Error loading model: %s", e)
+            raise EnhancerLoadError(f"Failed to load model: {str(e)}")
+        if self.warmup:
+            self.pipe("enhance prompt: warm up", max_length=16, do_sample=False)
+
+    def acquire(self):
+        """Return the loaded pipeline, loading it on first use. Pair with ``release()``."""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            if self.pipe is None:
+                with span("enhancer.load"):
+                    self._load()
+            self._in_use += 1
+            return self.pipe
+
+    def release(self):
+        with self._lock:
+            self._in_use -= 1
+            if self._in_use == 0 and self.idle_unload_seconds > 0:
+                self._timer = threading.Timer(self.idle_unload_seconds, self._unload_if_idle)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def _unload_if_idle(self):
+        with self._lock:
+            if self._in_use == 0:
+                self.unload()
+
+    def unload(self):
+        with self._lock:
+            if self.pipe is None:
+                return
+            self.pipe = None
+            gc.collect()
+            if self.device == "cuda":
+                import torch
+                torch.cuda.empty_cache()
+            logger.info("Prompt-Enhance model unloaded")
+
+
+_registries = {}
+_registry_lock = threading.Lock()
+
+def get_model_registry(backend="auto"):
+    with _registry_lock:
+        if backend not in _registries:
+            config = load_config()
+            _registries[backend] = EnhancerModelRegistry(
+                backend=backend,
+                idle_unload_seconds=config.get("enhancer_idle_unload_seconds", 0),
+                warmup=config.get("enhancer_warmup", False),
+                interop_threads=config.get("enhancer_interop_threads", 0),
+            )
+    return _registries[backend]
+
+class WildPromptor_Enhancer:
+    def __init__(self):
+        self.model_checkpoint = MODEL_CHECKPOINT
         self.max_target_length = 512
         self.prefix = "enhance prompt: "
 
@@ -55,6 +161,11 @@ class WildPromptor_Enhancer:
                 "combine_output": ("BOOLEAN", {"default": False, "tooltip": "Combine all outputs into one string or output as separate records"}),
                 "seed": ("INT", {"default": 0, "min": 0, "max": 0xffffffffffffffff})
             },
+            "optional": {
+                "backend": (BACKENDS, {"default": "auto", "tooltip": "auto: GPU when available. cpu: fp32 on CPU. cpu-int8: CPU with int8 dynamically quantized linear layers (faster, slightly different output)"}),
+                "cpu_threads": ("INT", {"default": 0, "min": 0, "max": 256, "tooltip": "Intra-op CPU threads used while generating. 0 keeps the torch default"}),
+                "batched": ("BOOLEAN", {"default": False, "tooltip": "Generate all sampled variants in one generate call (num_return_sequences=batch_size). Faster, but a given seed gives different results than the per-seed mode"}),
+            }
         }
 
     RETURN_TYPES = ("STRING",)
@@ -64,37 +175,67 @@ class WildPromptor_Enhancer:
     CATEGORY = "🧪AILab/🤖AI"
     class_type = "WildPromptor_Enhancer"
 
-    def enhancer(self, prompt, seed, batch_size, combine_output):
+    def _generate(self, pipe, input_text, seed, count, cpu_threads=0):
+        import torch
+
+        previous_threads = torch.get_num_threads()
+        if cpu_threads:
+            torch.set_num_threads(cpu_threads)
+        try:
+            torch.manual_seed(seed)
+            do_sample = seed != 0
+            with torch.inference_mode():
+                result = pipe(
+                    input_text,
+                    max_length=self.max_target_length,
+                    do_sample=do_sample,
+                    temperature=GENERATION_PARAMS["temperature"] if do_sample else 0.0,
+                    num_return_sequences=count,
+                    top_k=GENERATION_PARAMS["top_k"],
+                    top_p=GENERATION_PARAMS["top_p"],
+                )
+        finally:
+            if cpu_threads:
+                torch.set_num_threads(previous_threads)
+        return [item['generated_text'] for item in result]
+
+    def _cached_generate(self, input_text, seed, count, backend="auto", cpu_threads=0):
+        key = (input_text, seed, count, backend, self.max_target_length, tuple(sorted(GENERATION_PARAMS.items())))
+        outputs = _result_cache.get(key)
+        if outputs is None:
+            registry = get_model_registry(backend)
+            pipe = registry.acquire()
+            try:
+                with span("enhancer.generate"):
+                    outputs = self._generate(pipe, input_text, seed, count, cpu_threads)
+            finally:
+                registry.release()
+            _result_cache.put(key, outputs)
+        return list(outputs)
+
+    def enhancer(self, prompt, seed, batch_size, combine_output, backend="auto", cpu_threads=0, batched=False):
         if not prompt or prompt.isspace():
             return ([],)
             
-        enhanced_prompts = []
         input_text = self.prefix + prompt
         
         try:
-            for i in range(batch_size):
-                output_seed = seed + i if seed != 0 else 0
-                torch.manual_seed(output_seed)
-                
-                do_sample = output_seed != 0
-                temperature = 0.7 if do_sample else 0.0
-
-                result = self.pipe(
-                    input_text,
-                    max_length=self.max_target_length,
-                    do_sample=do_sample,
-                    temperature=temperature,
-                    num_return_sequences=1,
-                    top_k=50,
-                    top_p=0.95,
-                )
-                
-                enhanced_prompts.append(result[0]['generated_text'])
+            if seed == 0:
+                # Seed 0 is greedy decoding: every output is identical, so generate it once.
+                enhanced_prompts = self._cached_generate(input_text, 0, 1, backend, cpu_threads) * batch_size
+            elif batched:
+                enhanced_prompts = self._cached_generate(input_text, seed, batch_size, backend, cpu_threads)
+            else:
+                enhanced_prompts = [self._cached_generate(input_text, seed + i, 1, backend, cpu_threads)[0]
+                                    for i in range(batch_size)]
                 
+        except EnhancerLoadError:
+            raise
         except Exception as e:
-            print(f"Error during prompt enhancement: {str(e)}")
+            logger.error("Error during prompt enhancement: %s", e)
             return ([f"Error: {str(e)}"],)
-            
+
+        count_prompts(self.__class__.__name__, len(enhanced_prompts))
         if combine_output:
             return (["\n---\n".join(enhanced_prompts)],)
         else:
@@ -1,4 +1,5 @@
 import importlib.util
+import logging
 import os
 import sys
 
@@ -9,13 +10,17 @@ NODE_CLASS_MAPPINGS = {}
 NODE_DISPLAY_NAME_MAPPINGS = {}
 WEB_DIRECTORY = "./web"
 
-def load_modules_from_directory(directory):
+logger = logging.getLogger("WildPromptor")
+
+def load_modules_from_directory(directory, skip=()):
     if not os.path.exists(directory):
         return
 
     for file in os.listdir(directory):
         if not file.endswith(".py"):
             continue
+        if os.path.relpath(os.path.join(directory, file), current_dir) in skip:
+            continue
             
         module_name = os.path.basename(file)[:-3]
         if module_name == os.path.basename(__file__)[:-3]:
@@ -37,14 +42,36 @@ def load_modules_from_directory(directory):
                 NODE_DISPLAY_NAME_MAPPINGS.update(module.NODE_DISPLAY_NAME_MAPPINGS)
                 
         except Exception as e:
-            print(f"Error loading module {module_name}: {e}")
+            logger.error("Error loading module %s: %s", module_name, e)
 
 def load_javascript(web_directory):
     return []
 
+# Nodes listed in wildpromptor_core/manifest.py are registered as placeholders and
+# their modules only run on first use; any other .py file is still loaded eagerly.
+lazy_modules = ()
+try:
+    from wildpromptor_core import load_config
+    if load_config().get("lazy_nodes", True):
+        from wildpromptor_core.manifest import lazy_node_mappings, manifest_modules
+        lazy_classes, lazy_names = lazy_node_mappings()
+        NODE_CLASS_MAPPINGS.update(lazy_classes)
+        NODE_DISPLAY_NAME_MAPPINGS.update(lazy_names)
+        lazy_modules = manifest_modules()
+except Exception as e:
+    logger.error("Error loading WildPromptor node manifest: %s", e)
+
 load_modules_from_directory(current_dir)
-load_modules_from_directory(os.path.join(current_dir, "py"))
-load_modules_from_directory(os.path.join(current_dir, "AI"))
+load_modules_from_directory(os.path.join(current_dir, "py"), lazy_modules)
+load_modules_from_directory(os.path.join(current_dir, "AI"), lazy_modules)
+
+# The routes need aiohttp, which is only worth importing inside a running ComfyUI server.
+if "server" in sys.modules:
+    try:
+        from wildpromptor_core.routes import register_routes
+        register_routes()
+    except Exception as e:
+        logger.error("Error registering WildPromptor routes: %s", e)
 
 NODE_CLASS_MAPPINGS = dict(sorted(
     NODE_CLASS_MAPPINGS.items(),
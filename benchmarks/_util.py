@@ -0,0 +1,18 @@
+"""Helpers shared by the benchmark scripts."""
+import sys
+
+
+def peak_rss_mb():
+    """Peak resident memory of this process in MiB, or None when it cannot be read."""
+    try:
+        import resource
+    except ImportError:
+        try:
+            import psutil
+        except ImportError:
+            return None
+        info = psutil.Process().memory_info()
+        return getattr(info, "peak_wset", info.rss) / 2 ** 20
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is KiB on Linux and bytes on macOS.
+    return peak / 2 ** 20 if sys.platform == "darwin" else peak / 2 ** 10
@@ -0,0 +1,110 @@
+"""Compare Prompt Enhancer backends: tokens/sec and peak RSS.
+
+    python benchmarks/enhancer_backends.py --backends auto cpu cpu-int8 --prompts 8 --threads 4
+
+Each backend runs in its own subprocess so peak RSS is measured per backend.
+Needs torch and transformers; the Prompt-Enhance model is downloaded into
+``<models dir>/LLM/Prompt-Enhance`` on first use. Outside ComfyUI pass
+``--models-dir`` (or set COMFYUI_MODELS_DIR).
+"""
+import os
+import sys
+import json
+import time
+import types
+import argparse
+import subprocess
+import importlib.util
+
+from _util import peak_rss_mb
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PROMPTS = [
+    "a girl in a red dress, city street at night",
+    "old lighthouse on a cliff, stormy sea",
+    "cyberpunk samurai, neon rain",
+    "cozy cabin interior, winter, warm light",
+    "portrait of an astronaut, studio lighting",
+    "dragon flying over a medieval castle",
+    "a cat sleeping on a pile of books",
+    "desert caravan at sunset, wide shot",
+]
+
+
+def load_enhancer(models_dir):
+    sys.path.insert(0, ROOT_DIR)
+    try:
+        import folder_paths  # noqa: F401
+    except ImportError:
+        folder_paths = types.ModuleType("folder_paths")
+        folder_paths.models_dir = models_dir
+        sys.modules["folder_paths"] = folder_paths
+    spec = importlib.util.spec_from_file_location("WildPromptor_Enhancer", os.path.join(ROOT_DIR, "AI", "WildPromptor_Enhancer.py"))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def run_worker(args):
+    module = load_enhancer(args.models_dir)
+    node = module.WildPromptor_Enhancer()
+    registry = module.get_model_registry(args.worker)
+
+    start = time.perf_counter()
+    pipe = registry.acquire()
+    registry.release()
+    load_seconds = time.perf_counter() - start
+
+    prompts = (PROMPTS * (args.prompts // len(PROMPTS) + 1))[:args.prompts]
+    tokens = 0
+    start = time.perf_counter()
+    for i, prompt in enumerate(prompts):
+        outputs, = node.enhancer(prompt, seed=i + 1, batch_size=args.batch_size, combine_output=False,
+                                 backend=args.worker, cpu_threads=args.threads, batched=args.batched)
+        tokens += sum(len(pipe.tokenizer(text)["input_ids"]) for text in outputs)
+    seconds = time.perf_counter() - start
+
+    print(json.dumps({
+        "backend": args.worker,
+        "load_s": round(load_seconds, 2),
+        "generate_s": round(seconds, 2),
+        "tokens": tokens,
+        "tokens_per_s": round(tokens / seconds, 1) if seconds else None,
+        "peak_rss_mb": round(peak_rss_mb(), 1) if peak_rss_mb() is not None else None,
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backends", nargs="+", default=["auto", "cpu", "cpu-int8"])
+    parser.add_argument("--prompts", type=int, default=8, help="Number of prompts to enhance per backend")
+    parser.add_argument("--batch-size", type=int, default=1)
+    parser.add_argument("--batched", action="store_true", help="Use the single generate call mode")
+    parser.add_argument("--threads", type=int, default=0, help="cpu_threads passed to the node (0 = torch default)")
+    parser.add_argument("--models-dir", default=os.environ.get("COMFYUI_MODELS_DIR", os.path.join(ROOT_DIR, "models")))
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        run_worker(args)
+        return
+
+    print(f"{'backend':<10} {'load s':>8} {'gen s':>8} {'tokens':>8} {'tok/s':>8} {'peak RSS MB':>12}")
+    for backend in args.backends:
+        command = [sys.executable, __file__, "--worker", backend, "--prompts", str(args.prompts),
+                   "--batch-size", str(args.batch_size), "--threads", str(args.threads), "--models-dir", args.models_dir]
+        if args.batched:
+            command.append("--batched")
+        result = subprocess.run(command, capture_output=True, text=True)
+        lines = result.stdout.strip().splitlines()
+        if result.returncode != 0 or not lines:
+            print(f"{backend:<10} failed:\n{result.stderr.strip()}")
+            continue
+        row = json.loads(lines[-1])
+        print(f"{backend:<10} {row['load_s']:>8} {row['generate_s']:>8} {row['tokens']:>8} "
+              f"{row['tokens_per_s']:>8} {row['peak_rss_mb']:>12}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+"""Measure how long importing the WildPromptor package takes, and enforce a budget.
+
+    python benchmarks/import_time.py --runs 5 --budget-ms 100
+    python benchmarks/import_time.py --compare
+
+Each run imports the package in a fresh interpreter with ``python -X importtime``
+and the median is compared against ``--budget-ms``. Modules ComfyUI has already
+imported before it loads custom nodes (``--preload``) are imported first so they
+are not billed to the package. The script exits with status 1 when the budget is
+exceeded, when a module from ``--forbid`` (torch, transformers, ...) is imported
+at startup, or when the node manifest disagrees with the node modules' own
+``NODE_CLASS_MAPPINGS`` / ``NODE_DISPLAY_NAME_MAPPINGS``.
+
+Outside ComfyUI a stand-in ``folder_paths`` module is put on the path.
+"""
+import os
+import sys
+import json
+import argparse
+import tempfile
+import statistics
+import subprocess
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PRELOAD = ["argparse", "asyncio", "json", "threading", "typing", "importlib.util", "aiohttp.web"]
+MARKER = "--- WildPromptor package import starts here ---"
+FORBID = ["torch", "transformers", "huggingface_hub", "WildPromptor_Enhancer", "WildPromptor"]
+
+IMPORT_CODE = """
+import sys, json, time, importlib.util
+for name in {preload!r}:
+    try:
+        __import__(name)
+    except ImportError:
+        pass
+if {eager!r}:
+    sys.path.insert(0, {root!r})
+    import wildpromptor_core.store as store
+    store.load_config()["lazy_nodes"] = False
+spec = importlib.util.spec_from_file_location("WildPromptorPackage", {init!r}, submodule_search_locations=[{root!r}])
+package = importlib.util.module_from_spec(spec)
+sys.modules[spec.name] = package
+sys.stderr.write({marker!r} + "\\n")
+start = time.perf_counter()
+spec.loader.exec_module(package)
+seconds = time.perf_counter() - start
+print(json.dumps({{"ms": seconds * 1000, "nodes": len(package.NODE_CLASS_MAPPINGS),
+                  "loaded": [m for m in {forbid!r} if m in sys.modules]}}))
+"""
+
+CHECK_CODE = """
+import sys, json
+sys.path.insert(0, {root!r})
+from wildpromptor_core.manifest import load_node_module, manifest_modules, manifest_nodes
+classes, names = {{}}, {{}}
+for path in sorted(manifest_modules()):
+    module = load_node_module(path)
+    classes.update(module.NODE_CLASS_MAPPINGS)
+    names.update(getattr(module, "NODE_DISPLAY_NAME_MAPPINGS", {{}}))
+declared = manifest_nodes()
+problems = [f"{{node}}: missing from the manifest" for node in classes if node not in declared]
+problems += [f"{{node}}: declared but not defined" for node in declared if node not in classes]
+problems += [f"{{node}}: display name {{name!r}} != {{names.get(node)!r}}" for node, (_, name) in declared.items()
+             if node in names and names[node] != name]
+print(json.dumps(problems))
+"""
+
+
+def child_env(stub_dir):
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [stub_dir, env.get("PYTHONPATH")]))
+    return env
+
+
+def write_stub(stub_dir):
+    try:
+        import folder_paths  # noqa: F401
+        return
+    except ImportError:
+        pass
+    with open(os.path.join(stub_dir, "folder_paths.py"), "w") as f:
+        f.write(f"models_dir = {os.path.join(ROOT_DIR, 'models')!r}\n")
+
+
+def parse_importtime(stderr):
+    """(self us, cumulative us, name) for the ``-X importtime`` lines logged after MARKER."""
+    rows = []
+    for line in stderr.split(MARKER, 1)[-1].splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        own, cumulative, name = line[len("import time:"):].split("|")
+        rows.append((int(own), int(cumulative), name.strip()))
+    return rows
+
+
+def measure(args, env, eager=False):
+    code = IMPORT_CODE.format(preload=args.preload, eager=eager, forbid=args.forbid, marker=MARKER,
+                              init=os.path.join(ROOT_DIR, "__init__.py"), root=ROOT_DIR)
+    totals, rows, result = [], [], None
+    for _ in range(args.runs):
+        process = subprocess.run([sys.executable, "-X", "importtime", "-c", code], capture_output=True,
+                                 text=True, env=env, cwd=ROOT_DIR)
+        if process.returncode != 0:
+            sys.exit(f"Import failed:\n{process.stderr[-2000:]}")
+        rows = parse_importtime(process.stderr)
+        result = json.loads(process.stdout.strip().splitlines()[-1])
+        totals.append(result["ms"])
+    return statistics.median(totals), result, rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget-ms", type=float, default=100.0, help="Median import time allowed for the package")
+    parser.add_argument("--top", type=int, default=10, help="Show the N slowest modules imported by the package")
+    parser.add_argument("--preload", nargs="*", default=PRELOAD, help="Modules ComfyUI has imported already")
+    parser.add_argument("--forbid", nargs="*", default=FORBID, help="Modules that must not be imported at startup")
+    parser.add_argument("--compare", action="store_true", help="Also measure with lazy_nodes disabled")
+    parser.add_argument("--no-check", action="store_true", help="Skip the manifest consistency check")
+    args = parser.parse_args()
+
+    failures = []
+    with tempfile.TemporaryDirectory() as stub_dir:
+        write_stub(stub_dir)
+        env = child_env(stub_dir)
+
+        median, result, rows = measure(args, env)
+        print(f"lazy:  {median:8.1f} ms median over {args.runs} runs, {result['nodes']} nodes registered")
+        for own, cumulative, name in sorted(rows, reverse=True)[:args.top]:
+            print(f"    {own / 1000:8.1f} ms self {cumulative / 1000:8.1f} ms cumulative  {name}")
+        if median > args.budget_ms:
+            failures.append(f"import took {median:.1f} ms, budget is {args.budget_ms:.1f} ms")
+        if result["loaded"]:
+            failures.append(f"imported at startup: {', '.join(result['loaded'])}")
+
+        if args.compare:
+            eager_median, eager_result, _ = measure(args, env, eager=True)
+            print(f"eager: {eager_median:8.1f} ms median over {args.runs} runs, {eager_result['nodes']} nodes registered")
+
+        if not args.no_check:
+            process = subprocess.run([sys.executable, "-c", CHECK_CODE.format(root=ROOT_DIR)], capture_output=True,
+                                     text=True, env=env, cwd=ROOT_DIR)
+            if process.returncode != 0:
+                failures.append(f"manifest check failed:\n{process.stderr[-2000:]}")
+            else:
+                failures.extend(json.loads(process.stdout.strip().splitlines()[-1]))
+
+    for failure in failures:
+        print(f"FAIL {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
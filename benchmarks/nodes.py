@@ -0,0 +1,347 @@
+"""Benchmark the prompt nodes on synthetic wordlist trees.
+
+    python benchmarks/nodes.py
+    python benchmarks/nodes.py --scenarios wide=10000x10 tall=10x1000000 --batch-size 5000
+    python benchmarks/nodes.py --save before.json
+    python benchmarks/nodes.py --baseline before.json --tolerance 1.25
+
+A scenario ``NAME=FILESxLINES`` is a ``data/`` tree of FILES wordlists spread
+over up to ten folders, each with LINES ``title - content`` lines. Data To
+Prompt List reads one text file holding the same number of lines. Trees are
+generated once under ``--work-dir`` and reused while the seed and options stay
+the same.
+
+Each scenario runs in its own headless subprocess, with a stand-in
+``folder_paths`` module when ComfyUI is not importable. The worker points the
+nodes at the tree with ``set_store``, turns off the batch cache and sends node
+output to /dev/null. It reports:
+
+* ``INPUT_TYPES`` latency, cold (first parse or pack compile) and warm.
+* Generation throughput in prompts per second, best of ``--repeat`` runs.
+* Template compile time, first parse (cold) and from the template cache (warm).
+* Peak RSS.
+
+``--baseline`` compares the results with an earlier ``--save`` file and exits
+with status 1 when a timing is more than ``--tolerance`` times worse.
+
+``--check`` runs no timings. It writes files full of edge cases (CRLF, lone
+CR, form feeds, Unicode line breaks, titles, weights, custom separators) and
+checks that wordlists read back from compiled packs, and Data To Prompt List
+records streamed or read through record indexes, match plain text parsing
+exactly. It exits with status 1 on any difference.
+"""
+import os
+import sys
+import json
+import time
+import types
+import random
+import shutil
+import argparse
+import tempfile
+import contextlib
+import subprocess
+
+from _util import peak_rss_mb
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SCENARIOS = ["small=10x10", "medium=100x1000", "wide=10000x10", "deep=10x100000"]
+WORDS = ("red blue green golden silver dark bright misty ancient neon quiet wild soft sharp tiny giant "
+         "forest city ocean desert castle garden street temple harbor valley mountain river meadow "
+         "girl knight robot dragon cat wizard pilot dancer fox owl samurai astronaut").split()
+MAX_WIDGETS = 40
+
+
+def parse_scenario(text):
+    name, _, size = text.partition("=")
+    files, _, lines = (size or name).lower().partition("x")
+    return name, int(files), int(lines)
+
+
+def synthetic_line(rng, index, weighted):
+    words = " ".join(rng.choice(WORDS) for _ in range(rng.randint(3, 8)))
+    line = f"item{index} - {words}"
+    if weighted and index % 3 == 0:
+        line += f" :: {rng.randint(1, 5)}"
+    return line
+
+
+def build_tree(work_dir, name, files, lines, seed, weighted):
+    """Generate (or reuse) the data tree and the Data To Prompt List file of one scenario."""
+    root = os.path.join(work_dir, f"{name}-{files}x{lines}-s{seed}{'-w' if weighted else ''}")
+    done = os.path.join(root, ".complete")
+    if os.path.exists(done):
+        return root
+    rng = random.Random(seed)
+    folders = [f"Bench{i}" for i in range(min(10, files))]
+    for i in range(files):
+        folder = os.path.join(root, "data", folders[i % len(folders)])
+        os.makedirs(folder, exist_ok=True)
+        with open(os.path.join(folder, f"{i}.List{i}.txt"), "w", encoding="utf-8") as f:
+            f.writelines(synthetic_line(rng, j, weighted) + "\n" for j in range(lines))
+    with open(os.path.join(root, "records.txt"), "w", encoding="utf-8") as f:
+        for j in range(files * lines):
+            f.write(synthetic_line(rng, j, False).split(" - ", 1)[1] + "\n")
+    open(done, "w").close()
+    return root
+
+
+CHECK_PIECES = ["a", "b c", "é", "日本", " - ", "-", " ", ",", "::", " :: 2", ":: x", "\n", "\r\n", "\r", "\x0c",
+                "\x0b", "\x1c", "\x85", "\u2028", "\t", "|", "--", "、"]
+CHECK_SEPARATORS = ["", ",", "|", "--", " - ", "、", "\n"]
+
+
+def check_text(rng):
+    return "".join(rng.choice(CHECK_PIECES) for _ in range(rng.randint(0, 300)))
+
+
+def check_packs(root, rng, files):
+    """Differences between wordlists parsed from text and read from packs (compiled, then reopened)."""
+    from wildpromptor_core import WordlistStore
+    folder = os.path.join(root, "data", "Check")
+    os.makedirs(folder, exist_ok=True)
+    for i in range(files):
+        with open(os.path.join(folder, f"{i}.List{i}.txt"), "w", encoding="utf-8", newline="") as f:
+            f.write(check_text(rng))
+    expected = WordlistStore(os.path.join(root, "data")).folder("Check")
+    pack_dir = os.path.join(root, "cache", "wordlists")
+    problems = []
+    for label in ("compiled", "reopened"):
+        packed = WordlistStore(os.path.join(root, "data"), pack_dir).folder("Check")
+        for text, pack in zip(expected, packed):
+            for field in ("lines", "titles", "contents", "title_index", "weights"):
+                if getattr(text, field) != getattr(pack, field):
+                    problems.append(f"pack {label} {pack.filename}: {field} differs")
+    return problems
+
+
+def check_records(root, rng, files):
+    """Differences between split_and_clean over the whole text and streamed or indexed record reads."""
+    from wildpromptor_core.records import FileSource, split_and_clean
+    index_dir = os.path.join(root, "cache", "records")
+    problems = []
+    for i in range(files):
+        path = os.path.join(root, f"records{i}.txt")
+        with open(path, "w", encoding="utf-8", newline="") as f:
+            f.write(check_text(rng))
+        with open(path, "r", encoding="utf-8") as f:
+            text = f.read()
+        for separator in CHECK_SEPARATORS:
+            expected = split_and_clean(text, separator)
+            # A small block size makes records and separators straddle block boundaries.
+            streamed = FileSource(path, separator, block_size=7)
+            if list(streamed) != expected:
+                problems.append(f"records{i}.txt {separator!r}: streamed records differ")
+            if list(streamed.iter_reversed()) != expected[::-1]:
+                problems.append(f"records{i}.txt {separator!r}: reversed records differ")
+            indexed = FileSource(path, separator, index_dir)
+            count = indexed.indexed_count(wait=True)
+            if count is None:
+                continue
+            if indexed.read_indexed(range(count)) != expected:
+                problems.append(f"records{i}.txt {separator!r}: indexed records differ")
+    return problems
+
+
+def run_check(args):
+    sys.path.insert(0, ROOT_DIR)
+    rng = random.Random(args.seed)
+    root = tempfile.mkdtemp(prefix="wildpromptor-check-")
+    try:
+        problems = check_packs(root, rng, 200) + check_records(root, rng, 100)
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+    for problem in problems:
+        print(f"MISMATCH {problem}")
+    print(f"check: {len(problems)} mismatches")
+    sys.exit(1 if problems else 0)
+
+
+def timed(function, repeat=1):
+    """Best wall time in seconds of ``repeat`` calls, and the last result."""
+    best, result = None, None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        seconds = time.perf_counter() - start
+        best = seconds if best is None else min(best, seconds)
+    return best, result
+
+
+def run_worker(args):
+    root = args.worker
+    sys.path.insert(0, ROOT_DIR)
+    try:
+        import folder_paths  # noqa: F401
+    except ImportError:
+        folder_paths = types.ModuleType("folder_paths")
+        folder_paths.models_dir = os.path.join(root, "models")
+        sys.modules["folder_paths"] = folder_paths
+
+    from wildpromptor_core import WordlistStore, get_store, load_config, set_store
+    config = load_config()
+    config["batch_cache_size"] = 0
+    config["cache_path"] = os.path.join(root, "cache")
+    config["compiled_wordlists"] = not args.text
+    data_path = os.path.join(root, "data")
+    config["folders"] = sorted(os.listdir(data_path))
+    set_store(WordlistStore(data_path, None if args.text else os.path.join(root, "cache", "wordlists")))
+
+    from wildpromptor_core.manifest import load_node_module
+    results = {}
+    batch = args.batch_size
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        promptor = load_node_module(os.path.join("py", "WildPromptor.py"))
+        all_in_one = load_node_module(os.path.join("py", "WildPromptor_AllInOne.py"))
+        generator = load_node_module(os.path.join("py", "WildPromptor_Generator.py"))
+        data_list = load_node_module(os.path.join("py", "WildPromptor_dataToPromptList.py"))
+        template_node = load_node_module(os.path.join("py", "WildPromptor_Template.py"))
+
+        folder_node = promptor.NODE_CLASS_MAPPINGS[f"{config['folders'][0].capitalize()} 📋"]
+        for label, node in [("folder", folder_node), ("all_in_one", all_in_one.WildPromptorAllInOne),
+                            ("all_in_one_list", generator.AllInOneList)]:
+            results[f"input_types_{label}_cold_ms"] = timed(node.INPUT_TYPES)[0] * 1000
+            results[f"input_types_{label}_warm_ms"] = timed(node.INPUT_TYPES, args.repeat)[0] * 1000
+
+        widgets = sorted(k for k in folder_node.INPUT_TYPES()["optional"] if k.endswith("]"))[:MAX_WIDGETS]
+        selection_folder = {key: ["🎲Random", "🔢ordered"][i % 2] for i, key in enumerate(widgets)}
+        for seed_mode in ("legacy", "batched"):
+            seconds, _ = timed(lambda: folder_node().process_prompt(batch_size=batch, seed=1, seed_mode=seed_mode,
+                                                                    **selection_folder), args.repeat)
+            results[f"folder_{seed_mode}_per_s"] = batch / seconds
+
+        keys = sorted(k for k in all_in_one.WildPromptorAllInOne.INPUT_TYPES()["optional"] if k.endswith("]"))
+        selection = {key: ["🎲Random", "🔢ordered"][i % 2] for i, key in enumerate(keys[:MAX_WIDGETS])}
+        seconds, _ = timed(lambda: all_in_one.WildPromptorAllInOne().process_prompt(
+            batch_size=batch, seed=1, allow_duplicates=True, **selection), args.repeat)
+        results["all_in_one_per_s"] = batch / seconds
+
+        options, = generator.AllInOneList().select_options(**selection)
+        for seed_mode in ("legacy", "batched"):
+            seconds, _ = timed(lambda: generator.WildPromptorGenerator().process_prompt(
+                options, batch, 1, allow_duplicates=False, seed_mode=seed_mode), args.repeat)
+            results[f"generator_{seed_mode}_per_s"] = batch / seconds
+
+        # Wordlist picks, a folder pool, a multi-pick and nested groups; the first compile parses it,
+        # later ones hit the template cache.
+        from wildpromptor_core.template import compile_template
+        store = get_store()
+        parts = [f"{{{folder}/{wordlist.name}}}" for folder in config["folders"]
+                 for wordlist in store.folder(folder)][:MAX_WIDGETS]
+        parts += [f"{{{config['folders'][0]}/all}}", f"{{{config['folders'][-1]}/all|1-3}}",
+                  "{day|night|{dawn|dusk}}"]
+        template = ", ".join(parts)
+        results["template_compile_cold_ms"] = timed(lambda: compile_template(template))[0] * 1000
+        results["template_compile_warm_ms"] = timed(lambda: compile_template(template), args.repeat)[0] * 1000
+        seconds, _ = timed(lambda: template_node.WildPromptorTemplate().process_prompt(
+            template=template, batch_size=batch, seed=1), args.repeat)
+        results["template_per_s"] = batch / seconds
+
+        records = os.path.join(root, "records.txt")
+        node = data_list.WildPromptor_DataToPromptList()
+        for label, mode, seed_mode in [("sequential", "⬇️Sequential", "legacy"), ("reverse", "⬆️Reverse", "legacy"),
+                                       ("random", "🎲Random", "legacy"), ("random_batched", "🎲Random", "batched")]:
+            first, _ = timed(lambda: node.generate_prompts(records, batch_size=batch, mode=mode, seed=1,
+                                                           seed_mode=seed_mode))
+            seconds, _ = timed(lambda: node.generate_prompts(records, batch_size=batch, mode=mode, seed=1,
+                                                             seed_mode=seed_mode), args.repeat)
+            results[f"data_{label}_first_ms"] = first * 1000
+            results[f"data_{label}_per_s"] = batch / seconds
+
+        # A prompt list from a list node feeding the picker, plus a shared keyword pool.
+        prompts, = folder_node().process_prompt(batch_size=batch, seed=1, **selection_folder)
+        keywords = ", ".join(get_store().folder(config["folders"][0])[0].contents[:100000])
+        picker = promptor.KeywordPicker()
+        seconds, _ = timed(lambda: picker.pick_keywords(input_keywords=prompts, keywords=[keywords], pick_count=[5],
+                                                        seed=[1], allow_duplicates=[False]), args.repeat)
+        results["keyword_picker_per_s"] = batch / seconds
+
+        seconds, _ = timed(lambda: promptor.PromptConcatNode().process_prompt(
+            prefix=["masterpiece"], subject=prompts, suffix=["best quality"], remove_duplicates=[True]), args.repeat)
+        results["prompt_concat_per_s"] = batch / seconds
+        seconds, _ = timed(lambda: promptor.PromptBuilder().process_prompt(
+            prefix=["masterpiece"], content=prompts, suffix=["best quality"]), args.repeat)
+        results["prompt_builder_per_s"] = batch / seconds
+
+    results["peak_rss_mb"] = peak_rss_mb()
+    print(json.dumps(results))
+
+
+def compare(results, baseline, tolerance):
+    """Metrics that got more than ``tolerance`` times worse than ``baseline``."""
+    regressions = []
+    for scenario, metrics in results.items():
+        for metric, value in metrics.items():
+            old = baseline.get(scenario, {}).get(metric)
+            if not old or not value:
+                continue
+            if metric.endswith("_per_s"):
+                ratio = old / value
+            elif metric.endswith("_ms") and max(old, value) < 1.0:
+                continue  # sub-millisecond timings are mostly noise
+            elif metric.endswith("_ms") or metric.endswith("_mb"):
+                ratio = value / old
+            else:
+                continue
+            if ratio > tolerance:
+                regressions.append(f"{scenario} {metric}: {old:.1f} -> {value:.1f} ({ratio:.2f}x worse)")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenarios", nargs="+", default=SCENARIOS, help="NAME=FILESxLINES (lines per file)")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per measurement; the best one counts")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the synthetic data")
+    parser.add_argument("--weighted", action="store_true", help="Give every third line a ':: weight' suffix")
+    parser.add_argument("--text", action="store_true", help="Read the .txt files directly instead of compiled packs")
+    parser.add_argument("--work-dir", default=os.path.join(tempfile.gettempdir(), "wildpromptor-bench"))
+    parser.add_argument("--save", help="Write the results to this JSON file")
+    parser.add_argument("--baseline", help="Compare with results saved by --save")
+    parser.add_argument("--tolerance", type=float, default=1.25, help="Allowed slowdown factor against --baseline")
+    parser.add_argument("--check", action="store_true", help="Check packed and indexed reads against text parsing; no timings")
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        run_worker(args)
+        return
+    if args.check:
+        run_check(args)
+
+    results = {}
+    for text in args.scenarios:
+        name, files, lines = parse_scenario(text)
+        start = time.perf_counter()
+        root = build_tree(args.work_dir, name, files, lines, args.seed, args.weighted)
+        print(f"{name}: {files} files x {lines} lines ({time.perf_counter() - start:.1f} s to prepare)")
+        # Drop compiled packs and record indexes so every run measures the cold path the same way.
+        shutil.rmtree(os.path.join(root, "cache"), ignore_errors=True)
+        command = [sys.executable, __file__, "--worker", root, "--batch-size", str(args.batch_size),
+                   "--repeat", str(args.repeat)]
+        if args.text:
+            command.append("--text")
+        process = subprocess.run(command, capture_output=True, text=True)
+        lines_out = process.stdout.strip().splitlines()
+        if process.returncode != 0 or not lines_out:
+            print(f"  failed:\n{process.stderr.strip()}")
+            continue
+        results[name] = json.loads(lines_out[-1])
+        for metric, value in results[name].items():
+            print(f"  {metric:<36} {value:>12.1f}" if value is not None else f"  {metric:<36} {'n/a':>12}")
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(results, f, indent=2)
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        for regression in regressions:
+            print(f"SLOWER {regression}")
+        sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,22 +1,32 @@
 import os
 import random
-import json
 from typing import Tuple, List, Dict, Any
 
+from wildpromptor_core import display_name, get_store, load_config
+from wildpromptor_core.instrument import count_prompts, log_prompts
+from wildpromptor_core.keywords import draw_keywords, keyword_pool
+from wildpromptor_core.lists import COMBINE_MODES, COMBINE_TOOLTIP, combine_rows
+from wildpromptor_core.memo import fingerprint, memoized, wordlist_stamps
+from wildpromptor_core.options import combo_input, lazy_options_enabled, validate_controls, validate_selections
+from wildpromptor_core.sampler import (FIXED, ORDERED, ORDERED_MODE_TOOLTIP, ORDERED_MODES, RANDOM, SEED_MODE_TOOLTIP, SEED_MODES,
+                                      START_TOOLTIP, WEIGHTED, sample_prompts)
+
+CONTROL_TYPES = {
+    "batch_size": ("INT", {"default": 1, "min": 1, "max": 100000}),
+    "seed": ("INT", {"default": 0, "min": 0, "max": 0xffffffffffffffff}),
+    "seed_mode": (SEED_MODES, {"default": "legacy", "tooltip": SEED_MODE_TOOLTIP}),
+    "ordered_mode": (ORDERED_MODES, {"default": "lockstep", "tooltip": ORDERED_MODE_TOOLTIP}),
+    "count_start_from": ("INT", {"default": 1, "min": 1, "max": 0xffffffffffffffff, "tooltip": START_TOOLTIP}),
+}
+CONTROL_INPUTS = list(CONTROL_TYPES)
+
 def get_subfolder_names():
-    data_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data')
-    return [f for f in os.listdir(data_path) if os.path.isdir(os.path.join(data_path, f)) and f != '__pycache__']
+    return get_store().list_folders()
 
 class BaseNode:
-    _config = None
-
     @classmethod
     def load_config(cls):
-        if cls._config is None:
-            config_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'config.json')
-            with open(config_path, 'r') as f:
-                cls._config = json.load(f)
-        return cls._config
+        return load_config()
 
 class PromptListNode(BaseNode):
     RETURN_TYPES = ("STRING",)
@@ -24,113 +34,85 @@ class PromptListNode(BaseNode):
     FUNCTION = "process_prompt"
     OUTPUT_IS_LIST = (True,)
 
-    def get_txt_file_names(self):
-        return [f for f in os.listdir(self.data_path) if f.endswith(".txt")]
-    
     def __init__(self):
         self.config = self.load_config()
-        self.data_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data', self.FOLDER_NAME)
-        self.file_names = self.get_txt_file_names()
-        self.file_contents = self.load_file_contents()
-
-    def load_file_contents(self):
-        file_contents = {}
-        for filename in self.file_names:
-            file_contents[filename] = self.read_file_lines(filename)
-        return file_contents
-
-    def read_file_lines(self, filename):
-        file_path = os.path.join(self.data_path, filename)
-        try:
-            with open(file_path, 'r', encoding='utf-8') as file:
-                lines = [line.strip() for line in file if line.strip()]
-                titles = []
-                contents = []
-                for line in lines:
-                    if ' - ' in line:
-                        title, content = line.split(' - ', 1)
-                        titles.append(title)
-                        contents.append(content)
-                    else:
-                        titles.append(line)
-                        contents.append(line)
-                return titles, contents
-        except FileNotFoundError:
-            print(f"File not found: {file_path}")
-            return [], []
-        except Exception as e:
-            print(f"Error reading file {file_path}: {str(e)}")
-            return [], []
+        self.store = get_store()
+        self.data_path = self.store.folder_path(self.FOLDER_NAME)
+
+    def resolve_file(self, key):
+        return self.store.resolve(self.FOLDER_NAME, display_name(key))
 
     @classmethod
     def INPUT_TYPES(cls):
-        self = cls()
         inputs = {"required": {}, "optional": {}}
-        for filename in self.file_names:
-            original_name = os.path.splitext(filename)[0]
-            cleaned_name = original_name.split('.', 1)[-1] if '.' in original_name else original_name
-            titles, contents = self.file_contents[filename]
-            item_count = len(titles) if titles else len(contents)
-            # display_name = f"{self.FOLDER_NAME} - {cleaned_name} [{item_count}]"
-            display_name = f"{cleaned_name} [{item_count}]"
-            inputs["optional"][display_name] = (["❌disabled", "🎲Random", "🔢ordered"] + titles, {"default": "❌disabled"})
-
-        inputs["optional"]["batch_size"] = ("INT", {"default": 1, "min": 1, "max": 1000})
-        inputs["optional"]["seed"] = ("INT", {"default": 0, "min": 0, "max": 0xffffffffffffffff})
+        for wordlist in get_store().folder(cls.FOLDER_NAME):
+            # display_name = f"{cls.FOLDER_NAME} - {wordlist.name} [{len(wordlist)}]"
+            display_name = f"{wordlist.name} [{len(wordlist)}]"
+            inputs["optional"][display_name] = combo_input(wordlist, "titles")
+
+        inputs["optional"].update(CONTROL_TYPES)
         return inputs
 
-    def process_prompt(self, batch_size=1, seed=0, **kwargs):
-        random.seed(seed)
-        all_prompts = []
-
-        for _ in range(batch_size):
-            prompt_parts = []
-            for key, value in kwargs.items():
-                if key in ["batch_size", "seed"]:
-                    continue
-                if value == "🎲Random":
-                    cleaned_name = key.split(' [')[0]
-                    original_name = self.get_original_filename(cleaned_name)
-                    titles, contents = self.file_contents[original_name + '.txt']
-                    if contents:
-                        value = random.choice(contents)
-                elif value == "🔢ordered":
-                    cleaned_name = key.split(' [')[0]
-                    original_name = self.get_original_filename(cleaned_name)
-                    titles, contents = self.file_contents[original_name + '.txt']
-                    if contents:
-                        index = _ % len(contents)
-                        value = contents[index]
-                elif value not in ["❌disabled", "🎲Random", "🔢ordered"]:
-                    cleaned_name = key.split(' [')[0]
-                    original_name = self.get_original_filename(cleaned_name)
-                    titles, contents = self.file_contents[original_name + '.txt']
-                    if titles and value in titles:
-                        index = titles.index(value)
-                        value = contents[index]
-                if value not in ["❌disabled", "🎲Random", "🔢ordered"]:
-                    prompt_parts.append(str(value))
-            if prompt_parts:
-                all_prompts.append(", ".join(prompt_parts))
+    if lazy_options_enabled():
+        # Only lazy combos need this: with **kwargs ComfyUI skips its own checks for every input.
+        @classmethod
+        def VALIDATE_INPUTS(cls, **kwargs):
+            valid = validate_controls(CONTROL_TYPES, kwargs)
+            if valid is not True:
+                return valid
+            store = get_store()
+            selections = {k: v for k, v in kwargs.items() if k not in CONTROL_TYPES}
+            return validate_selections(selections, lambda key: store.resolve(cls.FOLDER_NAME, display_name(key)), "titles")
 
+    @classmethod
+    def IS_CHANGED(cls, **kwargs):
+        selected = [key for key, value in kwargs.items()
+                    if key not in CONTROL_INPUTS and value != "❌disabled"]
+        stamps = wordlist_stamps(get_store(), [(cls.FOLDER_NAME, display_name(key)) for key in selected])
+        return fingerprint(kwargs, stamps)
+
+    def resolve_columns(self, kwargs):
+        columns = []
+        for key, value in kwargs.items():
+            if key in CONTROL_INPUTS or value == "❌disabled":
+                continue
+            wordlist = self.resolve_file(key)
+            if value in ["🎲Random", "🔢ordered"]:
+                weighted = wordlist.weighted("contents") if wordlist and value == "🎲Random" else None
+                if weighted:
+                    columns.append((WEIGHTED, weighted))
+                elif wordlist:
+                    columns.append((RANDOM if value == "🎲Random" else ORDERED, wordlist.contents))
+            else:
+                if wordlist:
+                    value = wordlist.title_index.get(value, value)
+                columns.append((FIXED, str(value)))
+        return columns
+
+    def process_prompt(self, batch_size=1, seed=0, seed_mode="legacy", ordered_mode="lockstep", count_start_from=1, **kwargs):
+        key = self.IS_CHANGED(batch_size=batch_size, seed=seed, seed_mode=seed_mode, ordered_mode=ordered_mode,
+                              count_start_from=count_start_from, **kwargs)
+        return memoized(self.__class__.__name__, key, lambda: self.generate(
+            batch_size, seed, seed_mode, kwargs, ordered_mode, count_start_from))
+
+    def generate(self, batch_size, seed, seed_mode, kwargs, ordered_mode="lockstep", count_start_from=1):
+        all_prompts = sample_prompts(self.resolve_columns(kwargs), batch_size, seed, seed_mode,
+                                     ordered_mode=ordered_mode, offset=count_start_from - 1)
+        count_prompts(self.__class__.__name__, len(all_prompts))
         return (all_prompts,) if all_prompts else ([""],)
 
-    def get_original_filename(self, cleaned_name):
-        for filename in self.file_names:
-            if cleaned_name in filename:
-                return os.path.splitext(filename)[0]
-        return cleaned_name
-
 class PromptConcatNode(BaseNode):
     RETURN_TYPES = ("STRING",)
     RETURN_NAMES = ("prompt",)
+    INPUT_IS_LIST = True
+    OUTPUT_IS_LIST = (True,)
     FUNCTION = "process_prompt"
     CATEGORY = "🧪AILab/🧿WildPromptor/🔀Promptor"
 
     @classmethod
     def INPUT_TYPES(cls):
         config = cls.load_config()
-        data_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), config['data_path'])
+        store = get_store()
         folders = config['folders']
 
         inputs = {
@@ -140,60 +122,47 @@ class PromptConcatNode(BaseNode):
             }
         }
         for folder in folders:
-            if os.path.isdir(os.path.join(data_path, folder)):
+            if os.path.isdir(store.folder_path(folder)):
                 inputs["optional"][folder.lower()] = ("STRING", {"multiline": True, "default": ""})
         inputs["optional"].update({
             "suffix": ("STRING", {"multiline": True, "default": ""}),
             "separator": (["comma", "space", "newline"], {"default": "comma"}),
             "remove_duplicates": ("BOOLEAN", {"default": False}),
-            "sort": ("BOOLEAN", {"default": False})
+            "sort": ("BOOLEAN", {"default": False}),
+            "combine_mode": (COMBINE_MODES, {"default": "broadcast", "tooltip": COMBINE_TOOLTIP}),
         })
         return inputs
 
-    def process_prompt(self, prefix="", suffix="", separator="comma", remove_duplicates=False, sort=False, **kwargs):
-        prompt_parts = [part.strip() for part in [prefix] + list(kwargs.values()) + [suffix] if part and part.strip()]
-        
-        if not prompt_parts:
-            return ("",)
-        
-        if remove_duplicates:
-            prompt_parts = list(dict.fromkeys(prompt_parts))
-        
-        if sort:
-            middle_parts = prompt_parts[1:-1] if suffix else prompt_parts[1:]
-            middle_parts.sort()
-            prompt_parts = [prefix] + middle_parts + ([suffix] if suffix else [])
-        
-        final_prompt = {"comma": ", ", "space": " ", "newline": "\n"}[separator].join(prompt_parts)
-        
-        print(f"🔀 Prompt Concat output:\n{final_prompt}")
-        
-        return (final_prompt,)
-
-    def process_prompt(self, prefix="", suffix="", separator="comma", remove_duplicates=False, sort=False, **kwargs):
-        prompt_parts = [part.strip() for part in [prefix] + list(kwargs.values()) + [suffix] if part and part.strip()]
-        
-        if not prompt_parts:
-            return ("",)
-        
-        if remove_duplicates:
-            prompt_parts = list(dict.fromkeys(prompt_parts))
-        
-        if sort:
-            middle_parts = prompt_parts[1:-1] if suffix else prompt_parts[1:]
-            middle_parts.sort()
-            prompt_parts = [prefix] + middle_parts + ([suffix] if suffix else [])
-        
-        final_prompt = {"comma": ", ", "space": " ", "newline": "\n"}[separator].join(prompt_parts)
-        
-        print(f"🔀 Prompt Concat output:\n{final_prompt}")
-        
-        return (final_prompt,)
+    def process_prompt(self, prefix=None, suffix=None, separator=None, remove_duplicates=None, sort=None,
+                       combine_mode=None, **kwargs):
+        """Concatenate every row of the (list) inputs in one call; see ``combine_rows`` for the modes."""
+        joiner = {"comma": ", ", "space": " ", "newline": "\n"}[separator[0] if separator else "comma"]
+        remove_duplicates = remove_duplicates[0] if remove_duplicates else False
+        sort = sort[0] if sort else False
+        columns = [prefix or [""]] + list(kwargs.values()) + [suffix or [""]]
+
+        prompts = []
+        for row in combine_rows(columns, combine_mode[0] if combine_mode else "broadcast"):
+            row_prefix, row_suffix = row[0], row[-1]
+            prompt_parts = [part.strip() for part in row if part and part.strip()]
+            if not prompt_parts:
+                prompts.append("")
+                continue
+            if remove_duplicates:
+                prompt_parts = list(dict.fromkeys(prompt_parts))
+            if sort:
+                middle_parts = prompt_parts[1:-1] if row_suffix else prompt_parts[1:]
+                middle_parts.sort()
+                prompt_parts = [row_prefix] + middle_parts + ([row_suffix] if row_suffix else [])
+            prompts.append(joiner.join(prompt_parts))
+
+        log_prompts(self.__class__.__name__, prompts)
+        return (prompts,)
 
 class PromptBuilder:
     RETURN_TYPES = ("STRING", "STRING")
-    RETURN_NAMES = ("prompt", "content_only")  # 修改此处
-    # OUTPUT_IS_LIST = (False, False)
+    RETURN_NAMES = ("prompt", "content_only")
+    INPUT_IS_LIST = True
     OUTPUT_IS_LIST = (True, False)
     FUNCTION = "process_prompt"
     CATEGORY = "🧪AILab/🧿WildPromptor/🔀Promptor"
@@ -206,24 +175,33 @@ class PromptBuilder:
                 "prefix": ("STRING", {"multiline": True, "default": ""}),
                 "content": ("STRING", {"multiline": True, "default": ""}),
                 "suffix": ("STRING", {"multiline": True, "default": ""}),
+                "combine_mode": (COMBINE_MODES, {"default": "broadcast", "tooltip": COMBINE_TOOLTIP}),
             }
         }
 
-    def process_prompt(self, prefix: str = "", content: str = "", suffix: str = "") -> Tuple[List[str], str]:
-    # def process_prompt(self, prefix: str = "", content: str = "", suffix: str = "") -> List[str]:
-        if isinstance(content, list):
-            content = "\n".join(content)
+    def process_prompt(self, prefix=None, content=None, suffix=None, combine_mode=None) -> Tuple[List[str], str]:
+        """Wrap every line of each content item in its row's prefix/suffix.
 
-        lines = content.split('\n') if content else []
-        prompt_list = [f"{prefix}, {line}, {suffix}".strip(', ') for line in lines if line.strip()]
+        Rows are combined from the raw items first, so each row gives the
+        prompts (or the single empty prompt) the per-item call used to give.
+        ``content_only`` stays one string: the content items joined by newlines.
+        """
+        content = content or [""]
+        prompt_list = []
+        for row_prefix, row_content, row_suffix in combine_rows([prefix or [""], content, suffix or [""]],
+                                                                combine_mode[0] if combine_mode else "broadcast"):
+            lines = row_content.split('\n') if row_content else []
+            row_prompts = [f"{row_prefix}, {line}, {row_suffix}".strip(', ') for line in lines if line.strip()]
+            prompt_list.extend(row_prompts or [""])
 
-        return (prompt_list if prompt_list else [""], content)
+        return (prompt_list or [""], "\n".join(content))
 
 
 class KeywordPicker:
     RETURN_TYPES = ("STRING",)
     RETURN_NAMES = ("picked_keywords",)
-  # OUTPUT_IS_LIST = (True,)
+    INPUT_IS_LIST = True
+    OUTPUT_IS_LIST = (True,)
     FUNCTION = "pick_keywords"
     CATEGORY = "🧪AILab/🧿WildPromptor/🔀Promptor"
 
@@ -237,30 +215,45 @@ class KeywordPicker:
                 "pick_count": ("INT", {"default": 1, "min": 0, "max": 1000}),
                 "pick_mode": (["🎲Random", "🔢ordered"], {"default": "🎲Random"}),
                 "seed": ("INT", {"default": 0, "min": 0, "max": 0xffffffffffffffff}),
+                "allow_duplicates": ("BOOLEAN", {"default": True, "tooltip": "When off, a keyword picked for one item of the batch is not picked again for later items until every keyword has been used"}),
             }
         }
 
-    def pick_keywords(self, input_keywords="", keywords="", pick_count=1, pick_mode="🎲Random", seed=0):
-        combined_keywords = f"{input_keywords},{keywords}"
-        
-        if not combined_keywords.strip():
-            return ("",)
-        
-        keyword_list = [kw.strip() for kw in combined_keywords.split(', ') if kw.strip()]
-
-        if not keyword_list:
-            return ("",)
-        
-        if pick_count <= 0:
-            return ("",)
-        
-        if pick_mode == "🎲Random":
-            random.seed(seed)
-            picked = random.sample(keyword_list, min(pick_count, len(keyword_list)))
-        else:  # ordered
-            picked = keyword_list[:pick_count]
-        
-        return (", ".join(picked),)
+    def pick_keywords(self, input_keywords=None, keywords=None, pick_count=None, pick_mode=None, seed=None,
+                      allow_duplicates=None):
+        """Pick keywords for every item of an input list in one call.
+
+        Inputs arrive as lists (INPUT_IS_LIST); the shorter of ``input_keywords``
+        and ``keywords`` repeats its last entry. Item ``i`` is drawn with its own
+        ``random.Random(seed + i)``, so the first item uses ``seed`` like earlier versions. The pool is
+        deduplicated, so a text that lists a keyword twice no longer picks the same keywords as before.
+        """
+        input_keywords = input_keywords or [""]
+        keywords = keywords or [""]
+        pick_count = pick_count[0] if pick_count else 1
+        ordered = (pick_mode[0] if pick_mode else "🎲Random") == "🔢ordered"
+        seed = seed[0] if seed else 0
+        allow_duplicates = allow_duplicates[0] if allow_duplicates else True
+
+        picked_batch = []
+        used = set()
+        for i in range(max(len(input_keywords), len(keywords))):
+            pool = keyword_pool(input_keywords[min(i, len(input_keywords) - 1)] or "",
+                                keywords[min(i, len(keywords) - 1)] or "")
+            if not pool or pick_count <= 0:
+                picked_batch.append("")
+                continue
+            picked = draw_keywords(pool, pick_count, random.Random(seed + i), ordered, used)
+            if not allow_duplicates:
+                if len(picked) < min(pick_count, len(pool)) and used:
+                    # Every keyword has been used once: start another round.
+                    used.clear()
+                    picked = draw_keywords(pool, pick_count, random.Random(seed + i), ordered)
+                used.update(picked)
+            picked_batch.append(", ".join(picked))
+
+        count_prompts(self.__class__.__name__, len(picked_batch))
+        return (picked_batch,)
 
 def create_Promptor_node(folder_name):
     return type(f"{folder_name.capitalize()}PromptorNode", (PromptListNode,), {
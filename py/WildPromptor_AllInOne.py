@@ -1,8 +1,18 @@
-import os
 import random
-import json
 from typing import Tuple, List, Dict, Any
 
+from wildpromptor_core import get_store, load_config, split_widget_key
+from wildpromptor_core.instrument import log_prompts
+from wildpromptor_core.memo import fingerprint, memoized, wordlist_stamps
+from wildpromptor_core.options import combo_input, lazy_options_enabled, validate_controls, validate_selections
+from wildpromptor_core.weights import WeightedValues
+
+CONTROL_TYPES = {
+    "batch_size": ("INT", {"default": 1, "min": 1, "max": 1000}),
+    "seed": ("INT", {"default": 0, "min": 0, "max": 0xffffffffffffffff}),
+    "allow_duplicates": ("BOOLEAN", {"default": True}),
+}
+
 class WildPromptorAllInOne:
     RETURN_TYPES = ("STRING",)
     RETURN_NAMES = ("prompt",)
@@ -11,90 +21,96 @@ class WildPromptorAllInOne:
     CATEGORY = "🧪AILab/🧿WildPromptor/🔀Promptor"
 
     def __init__(self):
-        self.config = self.load_config()
-        self.data_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), self.config['data_path'])
+        self.config = load_config()
+        self.store = get_store()
+        self.data_path = self.store.data_path
 
-    def load_config(self):
-        config_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'config.json')
-        with open(config_path, 'r') as f:
-            return json.load(f)
-
-    def read_file_options(self, file_path):
-        with open(file_path, 'r', encoding='utf-8') as f:
-            return [line.strip() for line in f if line.strip()]
+    def read_file_options(self, folder, name, weighted=False):
+        wordlist = self.store.resolve(folder, name)
+        if not wordlist:
+            return ()
+        return (weighted and wordlist.weighted("lines")) or wordlist.lines
 
     @classmethod
     def INPUT_TYPES(cls):
-        self = cls()
+        store = get_store()
         inputs = {
             "required": {},
-            "optional": {
-                "batch_size": ("INT", {"default": 1, "min": 1, "max": 1000}),
-                "seed": ("INT", {"default": 0, "min": 0, "max": 0xffffffffffffffff}),
-                "allow_duplicates": ("BOOLEAN", {"default": True}),
-            }
+            "optional": dict(CONTROL_TYPES)
         }
 
-        for folder in self.config['folders']:
-            folder_path = os.path.join(self.data_path, folder)
-            if os.path.exists(folder_path):
-                for file in os.listdir(folder_path):
-                    if file.endswith('.txt'):
-                        original_name = os.path.splitext(file)[0]
-                        cleaned_name = original_name.split('.', 1)[-1] if '.' in original_name else original_name
-                        file_path = os.path.join(folder_path, file)
-                        options = self.read_file_options(file_path)
-                        item_count = len(options)
-                        display_name = f"{folder} - {cleaned_name} [{item_count}]"
-                        inputs["optional"][display_name] = (["❌disabled", "🎲Random", "🔢ordered"] + options, {"default": "❌disabled"})
+        for folder in load_config()['folders']:
+            for wordlist in store.folder(folder):
+                display_name = f"{folder} - {wordlist.name} [{len(wordlist)}]"
+                inputs["optional"][display_name] = combo_input(wordlist, "lines")
 
         return inputs
 
+    if lazy_options_enabled():
+        @classmethod
+        def VALIDATE_INPUTS(cls, **kwargs):
+            valid = validate_controls(CONTROL_TYPES, kwargs)
+            if valid is not True:
+                return valid
+            store = get_store()
+            selections = {k: v for k, v in kwargs.items() if k not in CONTROL_TYPES}
+            return validate_selections(selections, lambda key: store.resolve(*split_widget_key(key)), "lines")
+
+    @classmethod
+    def IS_CHANGED(cls, **kwargs):
+        selected = [key for key, value in kwargs.items()
+                    if key not in CONTROL_TYPES and value != "❌disabled"]
+        return fingerprint(kwargs, wordlist_stamps(get_store(), [split_widget_key(key) for key in selected]))
+
+    def resolve_options(self, kwargs):
+        """Resolve each enabled widget to (value, options) once per call."""
+        resolved = []
+        for key, value in kwargs.items():
+            if key in CONTROL_TYPES:
+                continue
+            if value == "❌disabled":
+                continue
+
+            options = self.read_file_options(*split_widget_key(key), weighted=value == "🎲Random")
+
+            if value in ["🎲Random", "🔢ordered"]:
+                if options:
+                    resolved.append((value, options))
+            elif value in options:
+                resolved.append((value, None))
+        return resolved
+
     def process_prompt(self, batch_size: int = 1, seed: int = 0, allow_duplicates: bool = True, **kwargs):
-        random.seed(seed)
+        key = self.IS_CHANGED(batch_size=batch_size, seed=seed, allow_duplicates=allow_duplicates, **kwargs)
+        return memoized(self.__class__.__name__, key, lambda: self.generate(batch_size, seed, allow_duplicates, kwargs))
+
+    def generate(self, batch_size: int, seed: int, allow_duplicates: bool, kwargs):
+        rng = random.Random(seed)
+        resolved = self.resolve_options(kwargs)
         all_prompts = []
 
         for i in range(batch_size):
             prompt_parts = []
-            for key, value in kwargs.items():
-                if key in ["batch_size", "seed", "allow_duplicates"]:
-                    continue
-                if value == "❌disabled":
-                    continue
-                
-                folder, cleaned_name = key.split(' - ', 1)
-                original_name = self.get_original_filename(folder, cleaned_name.split(' [')[0])
-                file_path = os.path.join(self.data_path, folder, f"{original_name}.txt")
-                options = self.read_file_options(file_path)
-                
+            for value, options in resolved:
                 if value == "🎲Random":
-                    if options:
-                        if allow_duplicates:
-                            prompt_parts.append(random.choice(options))
-                        else:
-                            prompt_parts.append(random.sample(options, 1)[0])
+                    if isinstance(options, WeightedValues):
+                        prompt_parts.append(options[options.table.draw(rng)])
+                    elif allow_duplicates:
+                        prompt_parts.append(rng.choice(options))
+                    else:
+                        prompt_parts.append(rng.sample(options, 1)[0])
                 elif value == "🔢ordered":
-                    if options:
-                        index = i % len(options)
-                        prompt_parts.append(options[index])
-                elif value in options:
+                    prompt_parts.append(options[i % len(options)])
+                else:
                     prompt_parts.append(value)
 
             if prompt_parts:
                 all_prompts.append(", ".join(prompt_parts))
 
-        for prompt in all_prompts:
-            print(f"🔀 WildPromptor All-in-One prompt: {prompt}")
+        log_prompts(self.__class__.__name__, all_prompts)
 
         return (all_prompts,) if all_prompts else ([""],)
 
-    def get_original_filename(self, folder, cleaned_name):
-        folder_path = os.path.join(self.data_path, folder)
-        for filename in os.listdir(folder_path):
-            if filename.endswith('.txt') and cleaned_name in filename:
-                return os.path.splitext(filename)[0]
-        return cleaned_name
-
 NODE_CLASS_MAPPINGS = {
     "WildPromptorAllInOne": WildPromptorAllInOne
 }
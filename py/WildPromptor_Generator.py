@@ -1,7 +1,12 @@
-import os
-import random
-import json
-from typing import Tuple, List, Dict, Any
+from typing import Tuple, List, Dict, Any, Optional
+
+from wildpromptor_core import get_store, load_config, split_widget_key
+from wildpromptor_core.instrument import log_prompts, logger
+from wildpromptor_core.memo import fingerprint, memoized, wordlist_stamps
+from wildpromptor_core.options import combo_input, lazy_options_enabled, validate_selections
+from wildpromptor_core.sampler import (FIXED, ORDERED, ORDERED_MODE_TOOLTIP, ORDERED_MODES, RANDOM, SEED_MODE_TOOLTIP, SEED_MODES,
+                                      START_TOOLTIP, WEIGHTED, sample_prompts)
+from wildpromptor_core.weights import WeightedValues
 
 class AllInOneList:
     RETURN_TYPES = ("DPROMPT_DATA",)
@@ -10,55 +15,37 @@ class AllInOneList:
     CATEGORY = "🧪AILab/🧿WildPromptor/📋Prompts List"
 
     def __init__(self):
-        self.config = self.load_config()
-        self.data_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), self.config['data_path'])
-        self.file_cache = {}
-
-    def load_config(self):
-        config_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'config.json')
-        with open(config_path, 'r') as f:
-            return json.load(f)
+        self.config = load_config()
+        self.store = get_store()
+        self.data_path = self.store.data_path
 
     @classmethod
     def INPUT_TYPES(cls):
-        self = cls()
+        store = get_store()
         inputs = {"required": {}, "optional": {}}
         
-        for folder in self.config['folders']:
-            folder_path = os.path.join(self.data_path, folder)
-            if os.path.exists(folder_path):
-                for file in os.listdir(folder_path):
-                    if file.endswith('.txt'):
-                        original_name = os.path.splitext(file)[0]
-                        cleaned_name = original_name.split('.', 1)[-1] if '.' in original_name else original_name
-                        file_path = os.path.join(folder_path, file)
-                        options = self.read_file_options(file_path)
-                        item_count = len(options)
-                        display_name = f"{folder} - {cleaned_name} [{item_count}]"
-                        options = self.read_file_options(os.path.join(folder_path, file))
-                        inputs["optional"][display_name] = (["❌disabled", "🎲Random", "🔢ordered"] + options, {"default": "❌disabled"})
+        for folder in load_config()['folders']:
+            for wordlist in store.folder(folder):
+                display_name = f"{folder} - {wordlist.name} [{len(wordlist)}]"
+                inputs["optional"][display_name] = combo_input(wordlist, "lines")
         
         return inputs
 
-    def read_file_options(self, file_path: str) -> List[str]:
-        if file_path in self.file_cache:
-            return self.file_cache[file_path]
-        try:
-            with open(file_path, 'r', encoding='utf-8') as file:
-                options = [line.strip() for line in file if line.strip()]
-            self.file_cache[file_path] = options
-            return options
-        except FileNotFoundError:
-            print(f"File not found: {file_path}")
-            return []
-        except Exception as e:
-            print(f"Error reading file {file_path}: {str(e)}")
-            return []
+    if lazy_options_enabled():
+        @classmethod
+        def VALIDATE_INPUTS(cls, **kwargs):
+            store = get_store()
+            return validate_selections(kwargs, lambda key: store.resolve(*split_widget_key(key)), "lines")
+
+    @classmethod
+    def IS_CHANGED(cls, **kwargs):
+        selected = [key for key, value in kwargs.items() if value != "❌disabled"]
+        return fingerprint(kwargs, wordlist_stamps(get_store(), [split_widget_key(key) for key in selected]))
 
     def select_options(self, **kwargs):
         selected_options = {k: v for k, v in kwargs.items() if v != "❌disabled"}
         if not selected_options:
-            print("Warning: No options selected.")
+            logger.warning("No options selected.")
         return (selected_options,)
 
 class WildPromptorGenerator:
@@ -69,87 +56,71 @@ class WildPromptorGenerator:
     CATEGORY = "🧪AILab/🧿WildPromptor/🔀Promptor"
 
     def __init__(self):
-        self.config = self.load_config()
-        self.data_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), self.config['data_path'])
-        self.file_cache = {}
-
-    def load_config(self):
-        config_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'config.json')
-        with open(config_path, 'r') as f:
-            return json.load(f)
+        self.config = load_config()
+        self.store = get_store()
+        self.data_path = self.store.data_path
 
     @classmethod
     def INPUT_TYPES(cls):
         return {
             "required": {
                 "selected_options": ("DPROMPT_DATA",),
-                "batch_size": ("INT", {"default": 1, "min": 1, "max": 1000}),
+                "batch_size": ("INT", {"default": 1, "min": 1, "max": 100000}),
                 "seed": ("INT", {"default": 0, "min": 0, "max": 0xffffffffffffffff}),
             },
             "optional": {
                 "allow_duplicates": ("BOOLEAN", {"default": True}),
+                "seed_mode": (SEED_MODES, {"default": "legacy", "tooltip": SEED_MODE_TOOLTIP}),
+                "ordered_mode": (ORDERED_MODES, {"default": "lockstep", "tooltip": ORDERED_MODE_TOOLTIP}),
+                "count_start_from": ("INT", {"default": 1, "min": 1, "max": 0xffffffffffffffff, "tooltip": START_TOOLTIP}),
             }
         }
 
-    def process_prompt(self, selected_options: Dict[str, Any], batch_size: int, seed: int, allow_duplicates: bool = True) -> Tuple[List[str]]:
-        random.seed(seed)
-        all_prompts = []
-
-        for i in range(batch_size):
-            prompt_parts = []
-            for key, value in selected_options.items():
-                if value == "🎲Random":
-                    folder, file_info = key.rsplit(' - ', 1)
-                    cleaned_name = file_info.split(' [')[0]
-                    original_name = self.get_original_filename(folder, cleaned_name)
-                    file_path = os.path.join(self.data_path, folder, f"{original_name}.txt")
-                    options = self.read_file_options(file_path)
-                    if options:
-                        if allow_duplicates:
-                            prompt_parts.append(random.choice(options))
-                        else:
-                            prompt_parts.append(random.sample(options, 1)[0])
-                elif value == "🔢ordered":
-                    folder, file_info = key.rsplit(' - ', 1)
-                    cleaned_name = file_info.split(' [')[0]
-                    original_name = self.get_original_filename(folder, cleaned_name)
-                    file_path = os.path.join(self.data_path, folder, f"{original_name}.txt")
-                    options = self.read_file_options(file_path)
-                    if options:
-                        index = i % len(options)
-                        prompt_parts.append(options[index])
-                elif value != "❌disabled":
-                    prompt_parts.append(str(value))
-            
-            if prompt_parts:
-                all_prompts.append(", ".join(prompt_parts))
-
-        for prompt in all_prompts:
-            print(f"🔀 WildPromptor Generator output: {prompt}")
+    @classmethod
+    def IS_CHANGED(cls, selected_options: Dict[str, Any] = None, **kwargs):
+        # Linked inputs are not passed here; an upstream AllInOneList fingerprints its own files.
+        selected = [key for key, value in (selected_options or {}).items() if value in ["🎲Random", "🔢ordered"]]
+        stamps = wordlist_stamps(get_store(), [split_widget_key(key) for key in selected])
+        return fingerprint(selected_options, kwargs, stamps)
+
+    def resolve_columns(self, selected_options: Dict[str, Any]):
+        columns = []
+        for key, value in selected_options.items():
+            if value in ["🎲Random", "🔢ordered"]:
+                weighted = self.read_weighted_options(*split_widget_key(key)) if value == "🎲Random" else None
+                options = self.read_file_options(*split_widget_key(key))
+                if weighted:
+                    columns.append((WEIGHTED, weighted))
+                elif options:
+                    columns.append((RANDOM if value == "🎲Random" else ORDERED, options))
+            elif value != "❌disabled":
+                columns.append((FIXED, str(value)))
+        return columns
+
+    def process_prompt(self, selected_options: Dict[str, Any], batch_size: int, seed: int, allow_duplicates: bool = True,
+                       seed_mode: str = "legacy", ordered_mode: str = "lockstep",
+                       count_start_from: int = 1) -> Tuple[List[str]]:
+        key = self.IS_CHANGED(selected_options, batch_size=batch_size, seed=seed, allow_duplicates=allow_duplicates,
+                              seed_mode=seed_mode, ordered_mode=ordered_mode, count_start_from=count_start_from)
+        return memoized(self.__class__.__name__, key, lambda: self.generate(
+            selected_options, batch_size, seed, allow_duplicates, seed_mode, ordered_mode, count_start_from))
+
+    def generate(self, selected_options: Dict[str, Any], batch_size: int, seed: int, allow_duplicates: bool,
+                 seed_mode: str, ordered_mode: str = "lockstep", count_start_from: int = 1) -> Tuple[List[str]]:
+        all_prompts = sample_prompts(self.resolve_columns(selected_options), batch_size, seed, seed_mode, allow_duplicates,
+                                     ordered_mode, count_start_from - 1)
+
+        log_prompts(self.__class__.__name__, all_prompts)
 
         return (all_prompts,)
 
-    def get_original_filename(self, folder, cleaned_name):
-        folder_path = os.path.join(self.data_path, folder)
-        for filename in os.listdir(folder_path):
-            if filename.endswith('.txt') and cleaned_name.split(' [')[0] in filename:
-                return os.path.splitext(filename)[0]
-        return cleaned_name.split(' [')[0]
-
-    def read_file_options(self, file_path: str) -> List[str]:
-        if file_path in self.file_cache:
-            return self.file_cache[file_path]
-        try:
-            with open(file_path, 'r', encoding='utf-8') as file:
-                options = [line.strip() for line in file if line.strip()]
-            self.file_cache[file_path] = options
-            return options
-        except FileNotFoundError:
-            print(f"File not found: {file_path}")
-            return []
-        except Exception as e:
-            print(f"Error reading file {file_path}: {str(e)}")
-            return []
+    def read_file_options(self, folder: str, name: str) -> Tuple[str, ...]:
+        wordlist = self.store.resolve(folder, name)
+        return wordlist.lines if wordlist else ()
+
+    def read_weighted_options(self, folder: str, name: str) -> Optional[WeightedValues]:
+        wordlist = self.store.resolve(folder, name)
+        return wordlist.weighted("lines") if wordlist else None
 
 NODE_CLASS_MAPPINGS = {
     "AllInOneList": AllInOneList,
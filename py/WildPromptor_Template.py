@@ -0,0 +1,65 @@
+from typing import List, Tuple
+
+from wildpromptor_core import get_store
+from wildpromptor_core.instrument import count_prompts
+from wildpromptor_core.memo import fingerprint, memoized
+from wildpromptor_core.template import TemplateError, compile_template, iter_picks, render_batch, resolve_reference
+
+TEMPLATE_TOOLTIP = (
+    "{Folder/list} draws an entry from a wordlist, {Folder/all} from the whole folder, "
+    "{Folder/list|2} or {Folder/list|1-3} several different entries. "
+    "{a|b|c} picks one alternative and can nest. Escape literal braces as \\{ \\}."
+)
+
+class WildPromptorTemplate:
+    RETURN_TYPES = ("STRING",)
+    RETURN_NAMES = ("prompt",)
+    FUNCTION = "process_prompt"
+    OUTPUT_IS_LIST = (True,)
+    CATEGORY = "🧪AILab/🧿WildPromptor/🔀Promptor"
+
+    @classmethod
+    def INPUT_TYPES(cls):
+        return {
+            "required": {
+                "template": ("STRING", {"multiline": True, "default": "", "placeholder": "a {Subject/Female} in {Location/all}, {day|night}", "tooltip": TEMPLATE_TOOLTIP}),
+                "batch_size": ("INT", {"default": 1, "min": 1, "max": 100000}),
+                "seed": ("INT", {"default": 0, "min": 0, "max": 0xffffffffffffffff}),
+            }
+        }
+
+    @classmethod
+    def VALIDATE_INPUTS(cls, template):
+        try:
+            compile_template(template)
+        except TemplateError as e:
+            return str(e)
+        return True
+
+    @classmethod
+    def IS_CHANGED(cls, template="", **kwargs):
+        store = get_store()
+        try:
+            picks = list(iter_picks(compile_template(template)))
+        except TemplateError:
+            picks = []
+        stamps = [(wordlist.folder, wordlist.filename, wordlist.stamp)
+                  for pick in picks for wordlist in resolve_reference(store, pick.folder, pick.name)]
+        return fingerprint(template, kwargs, stamps)
+
+    def process_prompt(self, template: str = "", batch_size: int = 1, seed: int = 0) -> Tuple[List[str]]:
+        key = self.IS_CHANGED(template, batch_size=batch_size, seed=seed)
+        return memoized(self.__class__.__name__, key, lambda: self.generate(template, batch_size, seed))
+
+    def generate(self, template: str, batch_size: int, seed: int) -> Tuple[List[str]]:
+        prompts = render_batch(template, get_store(), batch_size, seed)
+        count_prompts(self.__class__.__name__, len(prompts))
+        return (prompts or [""],)
+
+NODE_CLASS_MAPPINGS = {
+    "WildPromptorTemplate": WildPromptorTemplate
+}
+
+NODE_DISPLAY_NAME_MAPPINGS = {
+    "WildPromptorTemplate": "WildPromptor Template 🔀"
+}
@@ -1,5 +1,21 @@
+import os
 import random
 import re
+from array import array
+
+from wildpromptor_core import load_config
+from wildpromptor_core.instrument import count_prompts
+from wildpromptor_core.memo import fingerprint, memoized
+from wildpromptor_core.record_index import default_index_dir, source_stamp
+from wildpromptor_core.records import (DATA_EXTENSIONS, GLOB_CHARS, RecordSet, TextSource, expand_paths, open_source,
+                                       select_offsets, split_and_clean)
+from wildpromptor_core.sampler import SEED_MODES, FeistelPermutation
+
+SEED_MODE_TOOLTIP = (
+    "Random mode only. legacy: shuffles every record like earlier versions, so old workflows reproduce for the same seed. "
+    "batched: walks a seeded permutation that only evaluates the picked positions (much faster on large files, different order per seed)."
+)
+
 
 class WildPromptor_DataToPromptList: 
     def __init__(self):
@@ -9,7 +25,7 @@ class WildPromptor_DataToPromptList:
     def INPUT_TYPES(cls):
         return {
             "required": {
-                "path": ("STRING", {"default": "", "multiline": True, "placeholder": "file path", "tooltip": "Input file path(s). Multiple files can be separated by commas or newlines"}),
+                "path": ("STRING", {"default": "", "multiline": True, "placeholder": "file path", "tooltip": "Input file path(s). Multiple files can be separated by commas or newlines. Directories and glob patterns (e.g. captions/*.txt) are expanded in sorted order. Supports .txt, .csv/.tsv, .jsonl, .parquet and .gz/.zst compressed files"}),
                 "separator": ("STRING", {"default": "","placeholder": "custom separator", "tooltip": "Separator for splitting text. default is empty for newline splitting"}),
                 "batch_size": ("INT", {"default": 1, "min": 0, "max": 1000, "tooltip": "Number of prompts to generate. Set 0 for all"}),
                 "count_start_from": ("INT", {"default": 1, "min": 1, "tooltip": "Starting index for prompt selection"}),
@@ -18,7 +34,9 @@ class WildPromptor_DataToPromptList:
                 "seed": ("INT", {"default": 0, "min": 0, "max": 0xffffffffffffffff, "tooltip": "Random seed for reproducible results"}),
             },
             "optional": {
-                "text": ("STRING", {"forceInput": True, "multiline": True, "tooltip": "Direct text input, will be processed along with file input"})
+                "text": ("STRING", {"forceInput": True, "multiline": True, "tooltip": "Direct text input, will be processed along with file input"}),
+                "seed_mode": (SEED_MODES, {"default": "legacy", "tooltip": SEED_MODE_TOOLTIP}),
+                "field": ("STRING", {"default": "", "placeholder": "field / column", "tooltip": "Field (JSONL, dotted for nested keys) or column (CSV/TSV/Parquet, name or index) to read prompts from. Empty reads CSV/JSONL files as plain text and Parquet files from their first text column"}),
             }
         }
 
@@ -30,17 +48,10 @@ class WildPromptor_DataToPromptList:
 
     def _split_and_clean(self, text, separator):
         """Split text by separator and clean the results."""
-        if separator == "":
-            segments = []
-            for line in text.splitlines():
-                line = line.rstrip(',').strip()
-                if line:
-                    segments.append(line)
-        else:
-            segments = [segment.strip() for segment in text.split(separator) if segment.strip()]
-        return segments
+        return split_and_clean(text, separator)
 
-    def _process_file_paths(self, path):
+    @staticmethod
+    def _process_file_paths(path):
         """Process and validate file paths."""
         paths = re.split(r'\s*[,|\n]\s*', path.strip())
         cleaned_paths = []
@@ -49,7 +60,8 @@ class WildPromptor_DataToPromptList:
         for part in paths:
             if part:
                 buffer += part
-                if buffer.count('.') > 1 or buffer.endswith(('.txt', '.csv')):
+                if (buffer.count('.') > 1 or buffer.lower().endswith(DATA_EXTENSIONS)
+                        or os.path.isdir(buffer) or any(c in buffer for c in GLOB_CHARS)):
                     cleaned_paths.append(buffer.strip())
                     buffer = ""
         
@@ -58,72 +70,67 @@ class WildPromptor_DataToPromptList:
             
         return cleaned_paths
 
-    def _read_data(self, path, separator, text):
-        """Read and process data from both file and text input."""
-        data = []
-        
-        # Process direct text input
-        if text:
-            data.extend(self._split_and_clean(text, separator))
+    @classmethod
+    def IS_CHANGED(cls, path="", **kwargs):
+        """Fingerprint of the inputs plus the mtime/size of every file the path expands to."""
+        files = expand_paths(p for p in cls._process_file_paths(path) if p) if path else []
+        return fingerprint(path, kwargs, [(file_path, source_stamp(file_path)) for file_path in files])
 
-        # Process file input
+    def _record_set(self, path, separator, text, field=""):
+        """Direct text input first, then each file (directories and globs expanded), streamed on demand."""
+        config = load_config()
+        sources = []
+        if text:
+            sources.append(TextSource(text, separator))
         if path:
-            for file_path in self._process_file_paths(path):
-                if file_path:
-                    try:
-                        with open(file_path, 'r', encoding='utf-8') as f:
-                            data.extend(self._split_and_clean(f.read(), separator))
-                    except (FileNotFoundError, IOError) as e:
-                        print(f"Error reading file {file_path}: {e}")
-
-        return data
+            index_dir = default_index_dir() if config.get('index_data_files', True) else None
+            for file_path in expand_paths(p for p in self._process_file_paths(path) if p):
+                sources.append(open_source(file_path, separator, field, index_dir))
+        return RecordSet(sources, workers=config.get('data_read_workers', 8))
 
     def generate_prompts(self, path, batch_size=1, count_start_from=1, seed=0, 
-                        allow_duplicates=True, mode="⬇️Sequential", separator="", text=None):
-        """Generate prompts based on input parameters."""
-        random.seed(seed)
-        
-        # Read and process data
-        data = self._read_data(path, separator, text)
-        
-        if not data:
-            return (["No data available"], "No data available")
-        
-        # Handle batch size
-        if batch_size == 0:
-            batch_size = len(data)
-        
-        # Process data based on mode
-        data_len = len(data)
-        start_index = count_start_from - 1
+                        allow_duplicates=True, mode="⬇️Sequential", separator="", text=None, seed_mode="legacy", field=""):
+        """Generate prompts based on input parameters.
 
-        if mode == "⬆️Reverse":
-            data = data[::-1]
-        elif mode == "🎲Random":
-            random.shuffle(data)
+        Sequential and Reverse only read as many records as the batch needs
+        (Reverse reads files backwards from EOF). Random counts the records,
+        permutes their positions with the seed and fetches just the selected
+        ones, so memory grows with the batch and not with the file size;
+        ``seed_mode="batched"`` also skips the O(n) shuffle. Files with an
+        offset index are read with one seek per record.
+        """
+        key = self.IS_CHANGED(path, batch_size=batch_size, count_start_from=count_start_from, seed=seed,
+                              allow_duplicates=allow_duplicates, mode=mode, separator=separator, text=text,
+                              seed_mode=seed_mode, field=field)
+        return memoized(self.__class__.__name__, key, lambda: self._select(
+            path, batch_size, count_start_from, seed, allow_duplicates, mode, separator, text, seed_mode, field))
 
-        # Generate prompts
-        prompts = []
-        used_indices = set()
-        available_indices = list(range(start_index, data_len))
-        
-        for i in range(batch_size):
-            if not available_indices:
-                break
-            
-            if allow_duplicates:
-                index = available_indices[i % len(available_indices)]
+    def _select(self, path, batch_size, count_start_from, seed, allow_duplicates, mode, separator, text, seed_mode, field):
+        records = self._record_set(path, separator, text, field)
+        start_index = count_start_from - 1
+
+        if mode == "🎲Random":
+            total = records.count()
+            if not total:
+                return (["No data available"], "No data available")
+            if batch_size == 0:
+                batch_size = total
+            if seed_mode == "batched":
+                order = FeistelPermutation(total, seed)
             else:
-                if len(used_indices) >= len(available_indices):
-                    break
-                while True:
-                    index = available_indices[i % len(available_indices)]
-                    if index not in used_indices:
-                        used_indices.add(index)
-                        break
-                
-            prompts.append(data[index])
+                order = array('q', range(total))
+                random.Random(seed).shuffle(order)
+            offsets = select_offsets(total - start_index, batch_size, allow_duplicates)
+            prompts = records.fetch(order[start_index + offset] for offset in offsets)
+        else:
+            window, seen = records.take(start_index, batch_size or None, reverse=mode == "⬆️Reverse")
+            if not seen:
+                return (["No data available"], "No data available")
+            if batch_size == 0:
+                batch_size = seen
+            prompts = [window[offset] for offset in select_offsets(len(window), batch_size, allow_duplicates)]
 
+        count_prompts(self.__class__.__name__, len(prompts))
         prompt_list = "\n\n".join(prompts)
         return (prompts, prompt_list,)
 
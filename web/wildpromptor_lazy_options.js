@@ -0,0 +1,64 @@
+import { app } from "../../scripts/app.js";
+import { api } from "../../scripts/api.js";
+
+// Lazy option mode ("lazy_options": true in config.json): wordlist combos only
+// ship the control values plus a handle, and the entries are paged in from
+// /wildpromptor/options the first time the combo is opened.
+const PAGE_SIZE = 500;
+
+async function fetchAllOptions(handle) {
+    const options = [];
+    let total = Infinity;
+    while (options.length < total) {
+        const params = new URLSearchParams({
+            folder: handle.folder,
+            name: handle.name,
+            field: handle.field,
+            offset: options.length,
+            limit: PAGE_SIZE,
+        });
+        const response = await api.fetchApi(`/wildpromptor/options?${params}`);
+        if (!response.ok) break;
+        const page = await response.json();
+        total = page.total;
+        if (!page.options.length) break;
+        options.push(...page.options);
+    }
+    return options;
+}
+
+app.registerExtension({
+    name: "WildPromptor.LazyOptions",
+    async beforeRegisterNodeDef(nodeType, nodeData) {
+        const handles = {};
+        for (const section of ["required", "optional"]) {
+            for (const [name, spec] of Object.entries(nodeData.input?.[section] ?? {})) {
+                const handle = spec?.[1]?.wildpromptor_options;
+                if (handle) handles[name] = handle;
+            }
+        }
+        if (!Object.keys(handles).length) return;
+
+        const onNodeCreated = nodeType.prototype.onNodeCreated;
+        nodeType.prototype.onNodeCreated = function () {
+            const result = onNodeCreated?.apply(this, arguments);
+            for (const widget of this.widgets ?? []) {
+                const handle = handles[widget.name];
+                if (!handle) continue;
+                const controls = [...widget.options.values];
+                let loaded = null;
+                let loading = false;
+                widget.options.values = () => {
+                    if (!loaded && !loading) {
+                        loading = true;
+                        fetchAllOptions(handle)
+                            .then((options) => { loaded = controls.concat(options); })
+                            .finally(() => { loading = false; });
+                    }
+                    return loaded ?? controls;
+                };
+            }
+            return result;
+        };
+    },
+});
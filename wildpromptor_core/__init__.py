@@ -0,0 +1,5 @@
+from .store import (Wordlist, WordlistStore, clean_name, display_name, get_store, load_config, set_store,
+                    split_widget_key)
+
+__all__ = ["Wordlist", "WordlistStore", "clean_name", "display_name", "get_store", "load_config", "set_store",
+           "split_widget_key"]
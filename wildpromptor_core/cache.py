@@ -0,0 +1,59 @@
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional
+
+
+class LRUCache:
+    """Small thread-safe least-recently-used cache.
+
+    With ``weigh`` and ``maxweight`` the entries' total weight is also kept
+    under ``maxweight``; a single value heavier than that is not stored.
+    """
+
+    def __init__(self, maxsize: int = 128, maxweight: int = 0, weigh: Optional[Callable[[Any], int]] = None):
+        self.maxsize = maxsize
+        self.maxweight = maxweight
+        self.weigh = weigh
+        self.weight = 0
+        self.hits = 0
+        self.misses = 0
+        self._data: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._weights: Dict[Hashable, int] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            try:
+                self._data.move_to_end(key)
+            except KeyError:
+                self.misses += 1
+                return default
+            self.hits += 1
+            return self._data[key]
+
+    def put(self, key: Hashable, value: Any) -> None:
+        if self.maxsize <= 0:
+            return
+        weight = self.weigh(value) if self.weigh is not None else 0
+        if self.maxweight and weight > self.maxweight:
+            return
+        with self._lock:
+            self.weight += weight - self._weights.get(key, 0)
+            self._weights[key] = weight
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize or (self.maxweight and self.weight > self.maxweight):
+                evicted, _ = self._data.popitem(last=False)
+                self.weight -= self._weights.pop(evicted)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self._weights.clear()
+            self.weight = 0
+
+    def __len__(self):
+        return len(self._data)
+
+    def __contains__(self, key: Hashable):
+        return key in self._data
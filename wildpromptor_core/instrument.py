@@ -0,0 +1,119 @@
+"""Logging, counters and timing spans shared by the nodes.
+
+All output goes through the ``WildPromptor`` logger (``log_level`` in
+config.json). Generated prompts are logged sampled: one record per batch
+with the first ``log_prompt_sample`` prompts, at most once every
+``log_prompt_interval`` seconds per node; ``log_level: DEBUG`` logs every
+prompt. Counters and spans are kept in process and reported by ``stats()``,
+the ``/wildpromptor/stats`` route and ``dump_stats()``.
+"""
+import json
+import time
+import logging
+import threading
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Any, Dict, Optional, Sequence
+
+logger = logging.getLogger("WildPromptor")
+
+_lock = threading.Lock()
+_counters: Dict[str, int] = defaultdict(int)
+_spans: Dict[str, list] = {}
+_caches: Dict[str, Any] = {}
+_last_logged: Dict[str, float] = {}
+
+
+def configure(config: Dict[str, Any]) -> None:
+    """Apply the logging settings of config.json; called when the config is loaded."""
+    level = str(config.get('log_level', 'INFO')).upper()
+    if isinstance(logging.getLevelName(level), int):
+        logger.setLevel(level)
+    else:
+        logger.warning("Unknown log_level %r in config.json", level)
+
+
+def count(name: str, amount: int = 1) -> None:
+    with _lock:
+        _counters[name] += amount
+
+
+@contextmanager
+def span(name: str):
+    """Time the block; ``stats()`` reports calls, total, mean and max seconds per name."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        seconds = time.perf_counter() - start
+        with _lock:
+            entry = _spans.get(name)
+            if entry is None:
+                _spans[name] = [1, seconds, seconds]
+            else:
+                entry[0] += 1
+                entry[1] += seconds
+                entry[2] = max(entry[2], seconds)
+
+
+def register_cache(name: str, cache) -> None:
+    """Report an ``LRUCache``'s hits, misses and size in ``stats()``."""
+    _caches[name] = cache
+
+
+def count_prompts(node: str, amount: int) -> None:
+    count("prompts_generated", amount)
+    count(f"prompts_generated.{node}", amount)
+
+
+def log_prompts(node: str, prompts: Sequence[str]) -> None:
+    """Count a generated batch and log a sample of it as a single record."""
+    from .store import load_config
+    count_prompts(node, len(prompts))
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("%s: %d prompts\n%s", node, len(prompts), "\n".join(prompts))
+        return
+    if not prompts or not logger.isEnabledFor(logging.INFO):
+        return
+    config = load_config()
+    sample = int(config.get('log_prompt_sample', 3))
+    interval = float(config.get('log_prompt_interval', 0))
+    if sample <= 0:
+        return
+    now = time.monotonic()
+    with _lock:
+        if interval > 0 and now - _last_logged.get(node, -interval) < interval:
+            return
+        _last_logged[node] = now
+    more = f"\n(+{len(prompts) - sample} more)" if len(prompts) > sample else ""
+    logger.info("%s: %s%s", node, "\n".join(prompts[:sample]), more)
+
+
+def stats(reset: bool = False) -> Dict[str, Any]:
+    """Counters, spans and cache statistics collected since start (or the last reset)."""
+    with _lock:
+        result = {
+            "counters": dict(sorted(_counters.items())),
+            "spans": {name: {"calls": calls, "total_s": round(total, 6), "mean_s": round(total / calls, 6),
+                             "max_s": round(longest, 6)}
+                      for name, (calls, total, longest) in sorted(_spans.items())},
+            "caches": {name: {"hits": cache.hits, "misses": cache.misses, "size": len(cache)}
+                       for name, cache in sorted(_caches.items())},
+        }
+        if reset:
+            _counters.clear()
+            _spans.clear()
+            for cache in _caches.values():
+                cache.hits = cache.misses = 0
+    return result
+
+
+def dump_stats(path: Optional[str] = None, reset: bool = False) -> Dict[str, Any]:
+    """Write ``stats()`` as JSON to ``path``, or log it when no path is given."""
+    result = stats(reset)
+    if path:
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(result, f, indent=2)
+    else:
+        logger.info("stats: %s", json.dumps(result))
+    return result
@@ -0,0 +1,100 @@
+"""Keyword pools for the Keyword Picker.
+
+A pool is the ``", "``-separated keywords of one or more texts, stripped and
+deduplicated in first-seen order. ``keyword :: 2`` weights a keyword like a
+wordlist line, and in a weighted pool a keyword listed twice adds up its
+weights. A pool without any ``::`` weight is unweighted, repeats included,
+so it draws like ``rng.sample`` over the unique keywords. Texts are
+tokenized once and cached, so the keywords shared by every item of a batch
+are only split once.
+"""
+import heapq
+from itertools import compress
+from operator import not_
+from typing import AbstractSet, Dict, List
+
+from .cache import LRUCache
+from .weights import split_weight
+
+_pools = LRUCache(256)
+
+
+class KeywordPool:
+    """Unique keywords of a pool; ``weights`` is None when every keyword weighs 1."""
+    __slots__ = ("keywords", "weights", "_table")
+
+    def __init__(self, table: Dict[str, float], weighted: bool):
+        self._table = table
+        self.keywords = tuple(table)
+        self.weights = tuple(table.values()) if weighted else None
+
+    def __len__(self):
+        return len(self.keywords)
+
+
+def _add(table: Dict[str, float], text: str, weighted: bool) -> bool:
+    for part in text.split(', ') if text else ():
+        keyword, weight = split_weight(part.strip())
+        keyword = keyword.strip()
+        if not keyword:
+            continue
+        weighted = weighted or weight is not None
+        if keyword in table:
+            table[keyword] += 1.0 if weight is None else weight
+        else:
+            table[keyword] = 1.0 if weight is None else weight
+    return weighted
+
+
+def text_pool(text: str) -> KeywordPool:
+    """The pool of one text, tokenized once and cached."""
+    pool = _pools.get(text)
+    if pool is None:
+        table = {}
+        pool = KeywordPool(table, _add(table, text, False))
+        _pools.put(text, pool)
+    return pool
+
+
+def keyword_pool(text: str, shared: str = "") -> KeywordPool:
+    """Pool of ``text`` followed by the keywords of ``shared``, deduplicated.
+
+    Both texts are tokenized once; merging copies the two cached tables and
+    only visits the keywords they have in common.
+    """
+    if not shared:
+        return text_pool(text)
+    if not text:
+        return text_pool(shared)
+    first, second = text_pool(text), text_pool(shared)
+    table = dict(first._table)
+    # update() keeps the position of keys already present, so the order stays first-seen.
+    table.update(second._table)
+    repeated = first._table.keys() & second._table.keys()
+    for keyword in repeated:
+        table[keyword] = first._table[keyword] + second._table[keyword]
+    return KeywordPool(table, first.weights is not None or second.weights is not None)
+
+
+def draw_keywords(pool: KeywordPool, count: int, rng, ordered: bool = False,
+                  exclude: AbstractSet[str] = frozenset()) -> List[str]:
+    """Up to ``count`` different keywords of ``pool`` that are not in ``exclude``.
+
+    ``ordered`` takes them in pool order; otherwise they are drawn with ``rng``
+    (a ``random.Random``), in proportion to their weights when the pool has
+    any. Without weights or exclusions the draw matches ``rng.sample`` over the
+    keyword list.
+    """
+    keywords = pool.keywords
+    if exclude:
+        candidates = list(compress(range(len(keywords)), map(not_, map(exclude.__contains__, keywords))))
+    else:
+        candidates = range(len(keywords))
+    if ordered:
+        return [keywords[i] for i in candidates[:count]]
+    if pool.weights is None:
+        return [keywords[i] for i in rng.sample(candidates, min(count, len(candidates)))]
+    # Efraimidis-Spirakis: the largest u ** (1 / w) keys are a weighted sample without replacement.
+    weights = pool.weights
+    keys = [(rng.random() ** (1.0 / weights[i]), i) for i in candidates if weights[i] > 0]
+    return [keywords[i] for _, i in heapq.nlargest(count, keys)]
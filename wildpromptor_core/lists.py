@@ -0,0 +1,34 @@
+"""Combining list inputs element-wise for the INPUT_IS_LIST nodes.
+
+* ``broadcast`` (default): as long as the longest input; shorter inputs
+  repeat their last item, which is how ComfyUI maps a node over lists.
+* ``zip``: as long as the shortest input with more than one item; single
+  values still apply to every row.
+* ``product``: every combination, the last input changing fastest.
+"""
+from itertools import product
+from typing import Iterator, List, Sequence, Tuple
+
+COMBINE_MODES = ["broadcast", "zip", "product"]
+COMBINE_TOOLTIP = (
+    "How list inputs are combined. broadcast: as many results as the longest list, shorter lists repeat their "
+    "last item. zip: stop at the shortest list. product: every combination (sizes multiply)."
+)
+
+
+def combine_rows(columns: Sequence[Sequence[str]], mode: str = "broadcast") -> Iterator[Tuple[str, ...]]:
+    """One tuple per result, holding an item of every column; empty columns count as ``[""]``."""
+    columns: List[Sequence[str]] = [column if column else [""] for column in columns]
+    if not columns:
+        return iter(())
+    if mode == "product":
+        return product(*columns)
+    lengths = [len(column) for column in columns]
+    if mode == "zip":
+        size = min((length for length in lengths if length > 1), default=1)
+    else:
+        size = max(lengths)
+    if all(length >= size for length in lengths):
+        return zip(*columns)
+    return zip(*(column if length >= size else list(column) + [column[-1]] * (size - length)
+                 for column, length in zip(columns, lengths)))
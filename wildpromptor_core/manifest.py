@@ -0,0 +1,112 @@
+"""Lazy node registration.
+
+``NODES`` declares the nodes shipped in ``py/`` and ``AI/`` with their
+display names, so the package can register them at startup without
+executing the node modules (no wordlist scan, no ``folder_paths`` or model
+code). Each node is registered as a small placeholder class; the first
+attribute lookup or instantiation loads its module once and forwards to the
+real class from the module's ``NODE_CLASS_MAPPINGS``. The folder list nodes
+are declared from the subfolders of ``data_path``.
+"""
+import os
+import sys
+import threading
+import importlib.util
+from typing import Dict, Tuple
+
+from .instrument import logger
+from .store import ROOT_DIR, get_store
+
+PROMPTOR_MODULE = os.path.join("py", "WildPromptor.py")
+
+# node id -> (module file relative to the package root, display name)
+NODES: Dict[str, Tuple[str, str]] = {
+    "PromptConcat": (PROMPTOR_MODULE, "Prompt Concat 🔀"),
+    "PromptBuilder": (PROMPTOR_MODULE, "Prompt Builder 🔀"),
+    "KeywordPicker": (PROMPTOR_MODULE, "Keyword Picker 🔀"),
+    "WildPromptorAllInOne": (os.path.join("py", "WildPromptor_AllInOne.py"), "WildPromptor All-in-One 📋+🔀"),
+    "AllInOneList": (os.path.join("py", "WildPromptor_Generator.py"), "All-In-One List 📋"),
+    "WildPromptorGenerator": (os.path.join("py", "WildPromptor_Generator.py"), "WildPromptor Generator 🔀"),
+    "WildPromptorTemplate": (os.path.join("py", "WildPromptor_Template.py"), "WildPromptor Template 🔀"),
+    "WildPromptor_DataToPromptList": (os.path.join("py", "WildPromptor_dataToPromptList.py"), "Data To Prompt List 🔀+📋"),
+    "WildPromptor_Enhancer": (os.path.join("AI", "WildPromptor_Enhancer.py"), "🤖 Prompt Enhancer"),
+}
+
+_load_lock = threading.RLock()
+
+
+def folder_node_id(folder: str) -> str:
+    return f"{folder.capitalize()} 📋"
+
+
+def manifest_nodes() -> Dict[str, Tuple[str, str]]:
+    """``NODES`` plus one list node per data folder, as ``py/WildPromptor.py`` registers them."""
+    nodes = dict(NODES)
+    try:
+        folders = get_store().list_folders()
+    except OSError as e:
+        logger.error("Error listing WildPromptor data folders: %s", e)
+        folders = []
+    for folder in folders:
+        nodes[folder_node_id(folder)] = (PROMPTOR_MODULE, folder_node_id(folder))
+    return nodes
+
+
+def manifest_modules():
+    """Module files covered by the manifest, relative to the package root."""
+    return {module for module, _ in NODES.values()}
+
+
+def load_node_module(relative_path: str):
+    """Execute a node file once, registered in ``sys.modules`` under its file name like the eager loader does."""
+    module_name = os.path.splitext(os.path.basename(relative_path))[0]
+    with _load_lock:
+        module = sys.modules.get(module_name)
+        if module is not None and hasattr(module, "NODE_CLASS_MAPPINGS"):
+            return module
+        spec = importlib.util.spec_from_file_location(module_name, os.path.join(ROOT_DIR, relative_path))
+        module = importlib.util.module_from_spec(spec)
+        sys.modules[module_name] = module
+        try:
+            spec.loader.exec_module(module)
+        except BaseException:
+            sys.modules.pop(module_name, None)
+            raise
+        return module
+
+
+class LazyNodeType(type):
+    """Metaclass of the placeholder classes: loads the real node on first use."""
+
+    def materialize(cls):
+        node_class = cls.__dict__.get("_node_class")
+        if node_class is None:
+            module = load_node_module(cls._node_module)
+            node_class = module.NODE_CLASS_MAPPINGS.get(cls._node_id)
+            if node_class is None:
+                raise AttributeError(f"{cls._node_module} does not define node {cls._node_id!r}")
+            cls._node_class = node_class
+        return node_class
+
+    def __getattr__(cls, name):
+        # Only reached for attributes the placeholder itself lacks.
+        if name.startswith("__"):
+            raise AttributeError(name)
+        return getattr(cls.materialize(), name)
+
+    def __call__(cls, *args, **kwargs):
+        return cls.materialize()(*args, **kwargs)
+
+
+def lazy_node_class(node_id: str, module: str) -> type:
+    return LazyNodeType(node_id, (), {"_node_id": node_id, "_node_module": module, "_node_class": None})
+
+
+def lazy_node_mappings() -> Tuple[Dict[str, type], Dict[str, str]]:
+    """NODE_CLASS_MAPPINGS and NODE_DISPLAY_NAME_MAPPINGS built from the manifest alone."""
+    class_mappings = {}
+    display_mappings = {}
+    for node_id, (module, name) in manifest_nodes().items():
+        class_mappings[node_id] = lazy_node_class(node_id, module)
+        display_mappings[node_id] = name
+    return class_mappings, display_mappings
@@ -0,0 +1,57 @@
+"""Input fingerprints for ``IS_CHANGED`` and a shared LRU of generated batches.
+
+Every prompt node is deterministic for its inputs and the source files it
+reads, so the fingerprint of both identifies an output: ComfyUI compares it
+to skip re-running the node (and everything downstream), and the nodes use
+it as the key of a small in-process cache of recent results, bounded by
+``batch_cache_size`` entries and ``batch_cache_prompts`` stored prompts.
+"""
+import json
+import hashlib
+from typing import Any, Callable, Iterable, List, Tuple
+
+from .cache import LRUCache
+from .instrument import count, register_cache, span
+from .store import WordlistStore, load_config
+
+
+def _prompt_count(result: tuple) -> int:
+    return sum(len(value) if isinstance(value, list) else 1 for value in result)
+
+
+_batches = LRUCache(int(load_config().get('batch_cache_size', 32)),
+                    int(load_config().get('batch_cache_prompts', 100000)), _prompt_count)
+register_cache("batches", _batches)
+_MISSING = object()
+
+
+def fingerprint(*parts: Any) -> str:
+    """Stable digest of JSON-like parts (dict keys sorted, other objects by ``str``)."""
+    encoded = json.dumps(parts, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha1(encoded.encode('utf-8')).hexdigest()
+
+
+def wordlist_stamps(store: WordlistStore, names: Iterable[Tuple[str, str]]) -> List[Any]:
+    """(folder, name, mtime/size) of each wordlist; the stamp is None when it does not resolve."""
+    stamps = []
+    for folder, name in names:
+        wordlist = store.resolve(folder, name)
+        stamps.append((folder, name, wordlist.stamp if wordlist is not None else None))
+    return stamps
+
+
+def memoized(node: str, key: str, compute: Callable[[], tuple]) -> tuple:
+    """Return the cached result of ``node`` for ``key``, computing and storing it on a miss.
+
+    List outputs are copied on the way out so callers cannot change the cached batch.
+    """
+    result = _batches.get((node, key), _MISSING)
+    if result is _MISSING:
+        count(f"batch_cache_misses.{node}")
+        with span(f"node.{node}"):
+            result = compute()
+        _batches.put((node, key), result)
+    else:
+        count(f"batch_cache_hits.{node}")
+    return tuple(list(value) if isinstance(value, list) else value for value in result)
+
@@ -0,0 +1,89 @@
+from typing import Any, Dict, Tuple
+
+from .store import Wordlist, load_config
+
+CONTROL_VALUES = ["❌disabled", "🎲Random", "🔢ordered"]
+OPTION_FIELDS = ("titles", "lines")
+MAX_PAGE_SIZE = 1000
+
+
+def lazy_options_enabled() -> bool:
+    return bool(load_config().get("lazy_options", False))
+
+
+def combo_input(wordlist: Wordlist, field: str) -> Tuple[list, Dict[str, Any]]:
+    """Build the combo definition for one wordlist widget.
+
+    In lazy mode the combo only carries the control values plus a handle the
+    frontend uses to page through ``/wildpromptor/options``.
+    """
+    if lazy_options_enabled():
+        handle = {"folder": wordlist.folder, "name": wordlist.name, "field": field, "count": len(wordlist)}
+        return (list(CONTROL_VALUES), {"default": "❌disabled", "wildpromptor_options": handle})
+    return (CONTROL_VALUES + list(getattr(wordlist, field)), {"default": "❌disabled"})
+
+
+def is_valid_selection(wordlist: Wordlist, field: str, value: Any) -> bool:
+    if value in CONTROL_VALUES:
+        return True
+    if field == "titles":
+        return value in wordlist.title_index
+    return wordlist.has_line(value)
+
+
+def page_options(wordlist: Wordlist, field: str, offset: int = 0, limit: int = 100, query: str = "") -> Dict[str, Any]:
+    """Return one page of a wordlist, optionally filtered by a case-insensitive substring."""
+    values = getattr(wordlist, field)
+    if query:
+        needle = query.lower()
+        values = [value for value in values if needle in value.lower()]
+    offset = max(0, offset)
+    limit = max(0, min(limit, MAX_PAGE_SIZE))
+    return {
+        "folder": wordlist.folder,
+        "name": wordlist.name,
+        "total": len(values),
+        "offset": offset,
+        "options": list(values[offset:offset + limit]),
+    }
+
+
+def validate_selections(selections: Dict[str, Any], resolve, field: str):
+    """VALIDATE_INPUTS helper: check each widget value against its wordlist.
+
+    Lazy combos only declare the control values, so the node validates the
+    selected entries itself. ``resolve`` maps a widget key to its Wordlist.
+    """
+    for key, value in selections.items():
+        wordlist = resolve(key)
+        if wordlist is not None and not is_valid_selection(wordlist, field, value):
+            return f"Value not in list: {key}: '{value}'"
+    return True
+
+
+def validate_controls(controls: Dict[str, tuple], values: Dict[str, Any]):
+    """VALIDATE_INPUTS helper: check the non-wordlist widgets like ComfyUI does.
+
+    ComfyUI skips its own range and combo checks for every input once a node
+    declares ``VALIDATE_INPUTS(**kwargs)``, so lazy nodes check their control
+    widgets (``controls`` holds their INPUT_TYPES entries) here.
+    """
+    for name, spec in controls.items():
+        if name not in values:
+            continue
+        value = values[name]
+        kind = spec[0]
+        options = spec[1] if len(spec) > 1 else {}
+        if isinstance(kind, list):
+            if value not in kind:
+                return f"Value not in list: {name}: '{value}' not in {kind}"
+        elif kind in ("INT", "FLOAT"):
+            try:
+                value = int(value) if kind == "INT" else float(value)
+            except (TypeError, ValueError):
+                return f"Failed to convert an input value to a {kind} value: {name}, {values[name]}"
+            if "min" in options and value < options["min"]:
+                return f"Value {value} smaller than min of {options['min']}: {name}"
+            if "max" in options and value > options["max"]:
+                return f"Value {value} bigger than max of {options['max']}: {name}"
+    return True
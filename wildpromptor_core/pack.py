@@ -0,0 +1,241 @@
+"""Compiled wordlist packs.
+
+A pack holds every ``.txt`` wordlist of one data folder in a single
+pre-split binary file. Loading a list from a pack decodes its lines once into
+in-memory tuples without re-reading and re-splitting the text file, and a
+folder's lists come from one file instead of one open per list. The file is
+only mapped while it is read; packs speed up loading, they do not share
+memory between processes.
+
+Layout (native byte order, recorded in the directory)::
+
+    b"WPPACK03" | u64 directory offset | u64 directory length | sections... | directory (JSON)
+
+Each file contributes 8-byte aligned sections: ``lines`` (UTF-8, the lines
+joined with ``\n``, which a stripped line never contains), ``titled`` (u32,
+indices of the lines that have a ``title - content`` split) and ``pieces``
+(UTF-8, the title and content of each of those lines, joined with ``\n``).
+Lists with ``:: weight`` suffixes store the lines without them plus a
+``weights`` section (f64). Entries record the source
+mtime/size they were compiled from and are reused verbatim when the source
+has not changed.
+
+Run ``python -m wildpromptor_core`` to compile all folders up front.
+"""
+import os
+import sys
+import mmap
+import json
+import struct
+import argparse
+from array import array
+from contextlib import contextmanager, nullcontext
+from typing import Dict, List, Optional, Tuple
+
+from .instrument import logger
+from .weights import strip_weights
+
+MAGIC = b"WPPACK03"
+HEADER = struct.Struct("<8sQQ")
+PACK_SUFFIX = ".wppack"
+SECTIONS = ("lines", "titled", "pieces", "weights")
+
+
+def _align(position: int) -> int:
+    return (position + 7) & ~7
+
+
+class Pack:
+    """A pack file's directory. The file is only mapped while entries are read from it."""
+
+    def __init__(self, path: str, directory: Dict, stamp: Tuple[int, int]):
+        self.path = path
+        self.stamp = stamp
+        self.entries: Dict[str, Dict] = directory["files"]
+
+    @classmethod
+    def open(cls, path: str) -> Optional["Pack"]:
+        try:
+            with open(path, 'rb') as f:
+                st = os.fstat(f.fileno())
+                if st.st_size < HEADER.size:
+                    return None
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    magic, dir_offset, dir_length = HEADER.unpack_from(mm, 0)
+                    if magic != MAGIC or dir_offset + dir_length > len(mm):
+                        return None
+                    directory = json.loads(mm[dir_offset:dir_offset + dir_length].decode('utf-8'))
+        except (OSError, ValueError):
+            return None
+        if directory.get("byteorder") != sys.byteorder:
+            return None
+        return cls(path, directory, (st.st_mtime_ns, st.st_size))
+
+    def is_fresh(self, filename: str, stamp: Optional[Tuple[int, int]]) -> bool:
+        entry = self.entries.get(filename)
+        return entry is not None and stamp is not None and tuple(entry["stamp"]) == tuple(stamp)
+
+    @contextmanager
+    def mapped(self):
+        """Map the pack file for the duration of the block; yields None if it was replaced since ``open``.
+
+        Nothing keeps the mapping afterwards, so a later compile can replace
+        the file even on Windows, where a mapped file cannot be overwritten.
+        """
+        try:
+            f = open(self.path, 'rb')
+        except OSError:
+            yield None
+            return
+        with f:
+            st = os.fstat(f.fileno())
+            if (st.st_mtime_ns, st.st_size) != self.stamp:
+                yield None
+                return
+            try:
+                mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except (OSError, ValueError):
+                yield None
+                return
+            with mm:
+                yield mm
+
+    def raw_sections(self, mm, filename: str) -> Dict[str, bytes]:
+        entry = self.entries[filename]
+        return {name: mm[entry[name][0]:entry[name][0] + entry[name][1]] for name in SECTIONS if name in entry}
+
+    def decode(self, filename: str):
+        """Return (lines, titles, contents, title_index, weights) for one file, or None if the pack changed.
+
+        The strings are decoded once into tuples, laid out like
+        ``Wordlist.from_lines`` builds them: a line without a title is the same
+        object in all three tuples.
+        """
+        with self.mapped() as mm:
+            if mm is None:
+                return None
+            sections = self.raw_sections(mm, filename)
+        lines = tuple(str(sections["lines"], 'utf-8').split('\n')) if self.entries[filename]["count"] else ()
+        titled = array('I', sections["titled"])
+        pieces = str(sections["pieces"], 'utf-8').split('\n') if titled else []
+        if len(titled) == len(lines):
+            titles = tuple(pieces[0::2])
+            contents = tuple(pieces[1::2])
+        else:
+            titles = list(lines)
+            contents = list(lines)
+            for index, title, content in zip(titled, pieces[0::2], pieces[1::2]):
+                titles[index] = title
+                contents[index] = content
+            titles = tuple(titles)
+            contents = tuple(contents)
+        title_index = dict(zip(reversed(titles), reversed(contents)))
+        weights = tuple(array('d', sections["weights"])) if "weights" in sections else None
+        return lines, titles, contents, title_index, weights
+
+
+def compile_lines(lines: List[str]) -> Dict[str, bytes]:
+    """Encode parsed lines into the per-file pack sections."""
+    lines, weights = strip_weights(lines)
+    titled = array('I')
+    pieces = []
+    for index, line in enumerate(lines):
+        if '\n' in line:
+            raise ValueError("wordlist line contains a newline")
+        if ' - ' in line:
+            titled.append(index)
+            pieces.extend(line.split(' - ', 1))
+    sections = {
+        "lines": '\n'.join(lines).encode('utf-8'),
+        "titled": titled.tobytes(),
+        "pieces": '\n'.join(pieces).encode('utf-8'),
+    }
+    if weights is not None:
+        sections["weights"] = array('d', weights).tobytes()
+    return sections
+
+
+def compile_folder(folder_path: str, pack_path: str, previous: Optional[Pack] = None,
+                   read_lines=None) -> Optional[Pack]:
+    """(Re)build the pack for one folder, reusing unchanged entries from ``previous``.
+
+    Writes to a temporary file and atomically replaces ``pack_path``. Files
+    that cannot be read are left out so callers fall back to the text file.
+    """
+    if read_lines is None:
+        from .store import read_lines
+    try:
+        file_names = [f for f in os.listdir(folder_path) if f.endswith('.txt')]
+    except OSError:
+        return None
+
+    tmp_path = f"{pack_path}.{os.getpid()}.tmp"
+    directory = {"byteorder": sys.byteorder, "files": {}}
+    try:
+        os.makedirs(os.path.dirname(pack_path), exist_ok=True)
+        # The previous pack stays mapped only while its unchanged entries are copied.
+        with open(tmp_path, 'wb') as out, (previous.mapped() if previous is not None else nullcontext()) as mm:
+            out.write(HEADER.pack(MAGIC, 0, 0))
+            for filename in file_names:
+                file_path = os.path.join(folder_path, filename)
+                try:
+                    st = os.stat(file_path)
+                    stamp = (st.st_mtime_ns, st.st_size)
+                    if mm is not None and previous.is_fresh(filename, stamp):
+                        sections = previous.raw_sections(mm, filename)
+                        count = previous.entries[filename]["count"]
+                    else:
+                        lines = read_lines(file_path)
+                        sections = compile_lines(lines)
+                        count = len(lines)
+                except (OSError, ValueError) as e:
+                    logger.error("Error compiling wordlist %s: %s", file_path, e)
+                    continue
+                entry = {"stamp": list(stamp), "count": count}
+                for name in SECTIONS:
+                    if name not in sections:
+                        continue
+                    position = _align(out.tell())
+                    out.write(b"\0" * (position - out.tell()))
+                    out.write(sections[name])
+                    entry[name] = [position, len(sections[name])]
+                directory["files"][filename] = entry
+            encoded = json.dumps(directory).encode('utf-8')
+            dir_offset = out.tell()
+            out.write(encoded)
+            out.seek(0)
+            out.write(HEADER.pack(MAGIC, dir_offset, len(encoded)))
+        os.replace(tmp_path, pack_path)
+    except OSError as e:
+        logger.error("Error writing wordlist pack %s: %s", pack_path, e)
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        return None
+    return Pack.open(pack_path)
+
+
+def pack_path_for(pack_dir: str, folder: str) -> str:
+    return os.path.join(pack_dir, folder + PACK_SUFFIX)
+
+
+def main(argv=None):
+    from .store import ROOT_DIR, load_config, default_pack_dir
+
+    config = load_config()
+    parser = argparse.ArgumentParser(description="Compile WildPromptor wordlist folders into binary packs.")
+    parser.add_argument("folders", nargs="*", help="Folders to compile (default: every folder under the data path)")
+    parser.add_argument("--data", default=os.path.join(ROOT_DIR, config['data_path']), help="Wordlist data directory")
+    parser.add_argument("--out", default=default_pack_dir(), help="Directory to write packs to")
+    args = parser.parse_args(argv)
+
+    folders = args.folders or sorted(f for f in os.listdir(args.data) if os.path.isdir(os.path.join(args.data, f)))
+    for folder in folders:
+        pack_path = pack_path_for(args.out, folder)
+        pack = compile_folder(os.path.join(args.data, folder), pack_path, Pack.open(pack_path))
+        if pack is None:
+            print(f"{folder}: failed")
+        else:
+            lines = sum(entry["count"] for entry in pack.entries.values())
+            print(f"{folder}: {len(pack.entries)} files, {lines} lines -> {pack_path}")
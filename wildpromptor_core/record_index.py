@@ -0,0 +1,268 @@
+"""On-disk record offset indexes for Data To Prompt List sources.
+
+An index stores the raw byte span of every record of one text file, so a
+record can be read with a single ``seek`` instead of re-parsing the file up
+to it. Indexes live under ``<cache_path>/records``, are named after the
+source path and separator and remember the source mtime/size; a changed
+file simply gets a new index.
+
+Layout (little endian)::
+
+    b"WPIDX001" | i64 mtime_ns | i64 size | u64 count | (u64 start, u64 end) * count
+"""
+import os
+import re
+import sys
+import queue
+import struct
+import hashlib
+import threading
+from array import array
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .instrument import logger, span
+from .store import ROOT_DIR, load_config
+
+MAGIC = b"WPIDX001"
+HEADER = struct.Struct("<8sqqQ")
+SPAN = struct.Struct("<QQ")
+INDEX_SUFFIX = ".wpidx"
+LINE_BREAKS = "\r\n\x0b\x0c\x1c\x1d\x1e\x85\u2028\u2029"
+LINE_BREAK_BYTES = re.compile(rb"[\n\r\x0b\x0c\x1c\x1d\x1e]")
+
+_locks: Dict[str, threading.Lock] = {}
+_pending = set()
+_guard = threading.Lock()
+_queue: "queue.Queue[Tuple[str, str, str]]" = queue.Queue()
+_workers = 0
+
+
+def default_index_dir() -> str:
+    return os.path.join(ROOT_DIR, load_config().get('cache_path', 'cache'), 'records')
+
+
+def index_path_for(index_dir: str, path: str, separator: str) -> str:
+    key = hashlib.sha1(f"{os.path.abspath(path)}\0{separator}".encode('utf-8')).hexdigest()
+    return os.path.join(index_dir, key + INDEX_SUFFIX)
+
+
+def is_indexable(separator: str) -> bool:
+    # Text mode translates "\r\n" and "\r" before splitting, which only leaves
+    # raw byte spans intact when the separator itself has no line breaks.
+    return not any(c in separator for c in "\r\n")
+
+
+def source_stamp(path: str) -> Optional[Tuple[int, int]]:
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+
+def iter_line_blocks(f, block_size: int = 1 << 20) -> Iterator[List[str]]:
+    """Read a text stream opened with ``newline=''`` in blocks and yield its complete lines.
+
+    Each yielded list holds lines with their line break, split exactly like
+    ``str.splitlines(True)`` on the whole text; only the unfinished last line
+    is carried into the next block, so memory is one block plus one line.
+    Blocks start small and double up to ``block_size``.
+    """
+    carry = ""
+    # Start small so reading the first few records stays cheap, then grow to ``block_size``.
+    size = min(block_size, 1 << 14)
+    while True:
+        chunk = f.read(size)
+        size = min(size * 2, block_size)
+        text = carry + chunk
+        pieces = text.splitlines(True)
+        # A trailing "\r" may be the first half of "\r\n", so it stays with the carry too.
+        if chunk and pieces and (pieces[-1][-1] not in LINE_BREAKS or text.endswith('\r')):
+            carry = pieces.pop()
+        else:
+            carry = ""
+        yield pieces
+        if not chunk:
+            return
+
+
+def scan_spans(path: str, separator: str, block_size: int = 1 << 20) -> Iterator[Tuple[int, int]]:
+    """Yield the raw (start, end) byte span of every non-empty record, in file order."""
+    if separator == "":
+        with open(path, 'r', encoding='utf-8', newline='') as f:
+            position = 0
+            for pieces in iter_line_blocks(f, block_size):
+                ascii_only = all(piece.isascii() for piece in pieces)
+                for piece in pieces:
+                    body = piece.rstrip(LINE_BREAKS)
+                    size = len(piece) if ascii_only else len(piece.encode('utf-8'))
+                    if body.rstrip(',').strip():
+                        yield position, position + (len(body) if ascii_only else len(body.encode('utf-8')))
+                    position += size
+        return
+
+    sep_size = len(separator.encode('utf-8'))
+    with open(path, 'r', encoding='utf-8', newline='') as f:
+        position = 0
+        carry = ""
+        while True:
+            chunk = f.read(block_size)
+            if not chunk:
+                break
+            parts = (carry + chunk).split(separator)
+            carry = parts.pop()
+            for part in parts:
+                size = len(part.encode('utf-8'))
+                if part.strip():
+                    yield position, position + size
+                position += size + sep_size
+        if carry.strip():
+            yield position, position + len(carry.encode('utf-8'))
+
+
+class RecordIndex:
+    """A built index: record count plus span lookups read straight from the index file."""
+
+    def __init__(self, path: str, stamp: Tuple[int, int], count: int):
+        self.path = path
+        self.stamp = stamp
+        self.count = count
+
+    def __len__(self):
+        return self.count
+
+    @classmethod
+    def open(cls, index_path: str) -> Optional["RecordIndex"]:
+        try:
+            with open(index_path, 'rb') as f:
+                header = f.read(HEADER.size)
+                size = os.fstat(f.fileno()).st_size
+        except OSError:
+            return None
+        if len(header) < HEADER.size:
+            return None
+        magic, mtime_ns, source_size, count = HEADER.unpack(header)
+        if magic != MAGIC or size != HEADER.size + count * SPAN.size:
+            return None
+        return cls(index_path, (mtime_ns, source_size), count)
+
+    def spans(self, positions: Iterable[int]) -> List[Tuple[int, int]]:
+        """Spans for the given record positions, in the order given."""
+        positions = list(positions)
+        found = {}
+        with open(self.path, 'rb') as f:
+            for position in sorted(set(positions)):
+                f.seek(HEADER.size + position * SPAN.size)
+                found[position] = SPAN.unpack(f.read(SPAN.size))
+        return [found[position] for position in positions]
+
+
+def _write_spans(out, spans: array) -> None:
+    if sys.byteorder != 'little':
+        spans.byteswap()
+    out.write(spans.tobytes())
+
+
+def build_index(path: str, separator: str, index_path: str) -> Optional[RecordIndex]:
+    """Scan ``path`` once and write its index, replacing any previous one atomically."""
+    stamp = source_stamp(path)
+    if stamp is None:
+        return None
+    tmp_path = f"{index_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    count = 0
+    try:
+        os.makedirs(os.path.dirname(index_path), exist_ok=True)
+        with span("record_index.build"), open(tmp_path, 'wb') as out:
+            out.write(HEADER.pack(MAGIC, 0, 0, 0))
+            spans = array('Q')
+            for start, end in scan_spans(path, separator):
+                spans.append(start)
+                spans.append(end)
+                count += 1
+                if len(spans) >= 1 << 16:
+                    _write_spans(out, spans)
+                    spans = array('Q')
+            _write_spans(out, spans)
+            out.seek(0)
+            out.write(HEADER.pack(MAGIC, stamp[0], stamp[1], count))
+        if source_stamp(path) != stamp:
+            # The file changed while it was being scanned.
+            os.remove(tmp_path)
+            return None
+        os.replace(tmp_path, index_path)
+    except (OSError, UnicodeDecodeError) as e:
+        logger.error("Error indexing file %s: %s", path, e)
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        return None
+    return RecordIndex(index_path, stamp, count)
+
+
+def _lock_for(index_path: str) -> threading.Lock:
+    with _guard:
+        return _locks.setdefault(index_path, threading.Lock())
+
+
+def load_index(path: str, separator: str, index_dir: str, build: bool = True) -> Optional[RecordIndex]:
+    """Return a fresh index for ``path``, building it now when ``build`` is set.
+
+    Without ``build`` a missing or stale index is queued for the background
+    builders and None is returned, so the caller can stream this time.
+    """
+    if not is_indexable(separator):
+        return None
+    stamp = source_stamp(path)
+    if stamp is None:
+        return None
+    index_path = index_path_for(index_dir, path, separator)
+    index = RecordIndex.open(index_path)
+    if index is not None and index.stamp == stamp:
+        return index
+    if not build:
+        _build_in_background(path, separator, index_path)
+        return None
+    with _lock_for(index_path):
+        index = RecordIndex.open(index_path)
+        if index is not None and index.stamp == source_stamp(path):
+            return index
+        return build_index(path, separator, index_path)
+
+
+def _build_in_background(path: str, separator: str, index_path: str) -> None:
+    """Queue a build; at most ``data_read_workers`` builder threads run at a time."""
+    global _workers
+    with _guard:
+        if index_path in _pending:
+            return
+        _pending.add(index_path)
+        _queue.put((path, separator, index_path))
+        if _workers >= max(1, int(load_config().get('data_read_workers', 8))):
+            return
+        _workers += 1
+    threading.Thread(target=_background_builder, name="WildPromptorRecordIndex", daemon=True).start()
+
+
+def _background_builder() -> None:
+    global _workers
+    while True:
+        with _guard:
+            # Checked under the guard that _build_in_background queues under, so no build is left behind.
+            if _queue.empty():
+                _workers -= 1
+                return
+        try:
+            path, separator, index_path = _queue.get_nowait()
+        except queue.Empty:
+            continue
+        try:
+            with _lock_for(index_path):
+                index = RecordIndex.open(index_path)
+                if index is None or index.stamp != source_stamp(path):
+                    build_index(path, separator, index_path)
+        except Exception as e:
+            logger.error("Error indexing file %s: %s", path, e)
+        finally:
+            with _guard:
+                _pending.discard(index_path)
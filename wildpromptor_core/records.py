@@ -0,0 +1,484 @@
+"""Streaming record sources for Data To Prompt List.
+
+Records are the cleaned segments of a text: lines (trailing commas and
+whitespace stripped) when the separator is empty, ``separator``-delimited
+segments otherwise. File sources are read incrementally: forwards in chunks,
+and backwards from EOF in blocks for line records, so selecting a few records
+never loads the whole file. With an index directory, files are also read by
+byte offset from their record index (see ``record_index``).
+
+``.gz`` and ``.zst`` files are decompressed on the fly. With a ``field``,
+``.jsonl``, ``.csv``/``.tsv`` and ``.parquet`` files contribute the values of
+that field/column instead of their raw lines; each value is then split and
+cleaned like text.
+"""
+import io
+import os
+import csv
+import glob
+import gzip
+import json
+from bisect import bisect_right
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from itertools import accumulate, chain
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from .instrument import count, logger
+from .record_index import LINE_BREAK_BYTES, LINE_BREAKS, iter_line_blocks, load_index
+
+BLOCK_SIZE = 1 << 20
+COMPRESSED_EXTENSIONS = ('.gz', '.zst')
+JSONL_EXTENSIONS = ('.jsonl', '.ndjson')
+CSV_EXTENSIONS = ('.csv', '.tsv')
+PARQUET_EXTENSIONS = ('.parquet',)
+DATA_EXTENSIONS = ('.txt',) + CSV_EXTENSIONS + JSONL_EXTENSIONS + PARQUET_EXTENSIONS + COMPRESSED_EXTENSIONS
+GLOB_CHARS = '*?['
+
+
+def expand_paths(paths: Iterable[str], extensions: Tuple[str, ...] = DATA_EXTENSIONS) -> List[str]:
+    """Expand directories and glob patterns (``captions/*.txt``, ``shards/**/*.txt``) into files.
+
+    Both only keep files with one of ``extensions``, so ``data/*`` skips
+    images and index files. Directory listings and glob matches are sorted, so the merged record
+    order does not depend on the file system. Other paths are kept as given
+    and reported when they cannot be read.
+    """
+    expanded = []
+    for path in paths:
+        if os.path.isdir(path):
+            expanded.extend(sorted(
+                os.path.join(path, name) for name in os.listdir(path)
+                if name.lower().endswith(extensions) and os.path.isfile(os.path.join(path, name))
+            ))
+        elif not os.path.exists(path) and any(c in path for c in GLOB_CHARS):
+            matches = sorted(match for match in glob.glob(path, recursive=True)
+                             if match.lower().endswith(extensions) and os.path.isfile(match))
+            if not matches:
+                logger.warning("No files match %s", path)
+            expanded.extend(matches)
+        else:
+            expanded.append(path)
+    return expanded
+
+
+def split_and_clean(text: str, separator: str) -> List[str]:
+    """Split text by separator and clean the results."""
+    if separator == "":
+        segments = []
+        for line in text.splitlines():
+            line = line.rstrip(',').strip()
+            if line:
+                segments.append(line)
+    else:
+        segments = [segment.strip() for segment in text.split(separator) if segment.strip()]
+    return segments
+
+
+def _strip_compression(path: str) -> str:
+    lower = path.lower()
+    for extension in COMPRESSED_EXTENSIONS:
+        if lower.endswith(extension):
+            return lower[:-len(extension)]
+    return lower
+
+
+def open_binary(path: str):
+    """Open ``path`` for reading bytes, decompressing ``.gz``/``.zst`` on the fly."""
+    count("data_file_opens")
+    lower = path.lower()
+    if lower.endswith('.gz'):
+        return gzip.open(path, 'rb')
+    if lower.endswith('.zst'):
+        try:
+            import zstandard
+        except ImportError:
+            raise IOError("reading .zst files requires the zstandard package (pip install zstandard)")
+        reader = zstandard.ZstdDecompressor().stream_reader(open(path, 'rb'), read_across_frames=True, closefd=True)
+        return io.BufferedReader(reader, BLOCK_SIZE)
+    return open(path, 'rb')
+
+
+def open_text(path: str, newline: Optional[str] = None):
+    return io.TextIOWrapper(open_binary(path), encoding='utf-8', newline=newline)
+
+
+class TextSource:
+    """Records from an in-memory string."""
+
+    def __init__(self, text: str, separator: str):
+        self.records = split_and_clean(text, separator)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.records)
+
+    def iter_reversed(self, limit: Optional[int] = None) -> Iterator[str]:
+        return reversed(self.records)
+
+    def count(self) -> int:
+        return len(self.records)
+
+    def indexed_count(self, wait: bool = False) -> Optional[int]:
+        return len(self.records)
+
+    def read_indexed(self, positions: Iterable[int]) -> List[str]:
+        return [self.records[position] for position in positions]
+
+
+class FileSource:
+    """Records streamed from a UTF-8 text file."""
+
+    def __init__(self, path: str, separator: str, index_dir: Optional[str] = None, block_size: int = BLOCK_SIZE):
+        self.path = path
+        self.separator = separator
+        self.index_dir = index_dir
+        self.block_size = block_size
+        self.compressed = path.lower().endswith(COMPRESSED_EXTENSIONS)
+        self._reported = False
+        self._index = None
+
+    def _report(self, error: Exception) -> None:
+        if not self._reported:
+            logger.error("Error reading file %s: %s", self.path, error)
+            self._reported = True
+
+    def _open(self, mode: str, newline: Optional[str] = None):
+        try:
+            return open_binary(self.path) if 'b' in mode else open_text(self.path, newline)
+        except (FileNotFoundError, IOError) as e:
+            self._report(e)
+            return None
+
+    def _guarded(self, records: Iterator[str]) -> Iterator[str]:
+        """Stop a source at a read or decode error, reporting it once, instead of failing the node."""
+        try:
+            yield from records
+        except (OSError, UnicodeDecodeError) as e:
+            self._report(e)
+
+    def __iter__(self) -> Iterator[str]:
+        return self._guarded(self._records())
+
+    def _records(self) -> Iterator[str]:
+        if self.separator == "":
+            f = self._open('r', newline='')
+            if f is None:
+                return
+            with f:
+                for pieces in iter_line_blocks(f, self.block_size):
+                    for piece in pieces:
+                        line = piece.rstrip(LINE_BREAKS).rstrip(',').strip()
+                        if line:
+                            yield line
+            return
+
+        f = self._open('r')
+        if f is None:
+            return
+        with f:
+            carry = ""
+            while True:
+                chunk = f.read(self.block_size)
+                if not chunk:
+                    break
+                parts = (carry + chunk).split(self.separator)
+                carry = parts.pop()
+                for segment in parts:
+                    segment = segment.strip()
+                    if segment:
+                        yield segment
+            carry = carry.strip()
+            if carry:
+                yield carry
+
+    def iter_reversed(self, limit: Optional[int] = None) -> Iterator[str]:
+        """Records from the last one backwards; ``limit`` is how many the caller may need."""
+        if self.separator != "" or self.compressed:
+            # Custom separators can overlap themselves ("--" in "---"), so they are
+            # only split correctly left to right, and compressed streams cannot
+            # seek backwards; keep just the needed tail.
+            return reversed(deque(self, maxlen=limit))
+        return self._guarded(self._iter_lines_reversed())
+
+    def _iter_lines_reversed(self) -> Iterator[str]:
+        f = self._open('rb')
+        if f is None:
+            return
+        with f:
+            f.seek(0, os.SEEK_END)
+            position = f.tell()
+            tail = b""
+            while position > 0:
+                step = min(self.block_size, position)
+                position -= step
+                f.seek(position)
+                parts = (f.read(step) + tail).split(b"\n")
+                if len(parts[0]) > self.block_size:
+                    # No "\n" in a whole block (lone "\r" or form feed breaks): also split on the other
+                    # one-byte breaks, which never occur inside a UTF-8 sequence, to keep the tail bounded.
+                    parts = LINE_BREAK_BYTES.split(parts[0]) + parts[1:]
+                tail = parts[0]
+                for raw in reversed(parts[1:]):
+                    yield from self._clean_lines_reversed(raw)
+            yield from self._clean_lines_reversed(tail)
+
+    @staticmethod
+    def _clean_lines_reversed(raw: bytes) -> Iterator[str]:
+        for line in reversed(raw.decode('utf-8').splitlines()):
+            line = line.rstrip(',').strip()
+            if line:
+                yield line
+
+    def count(self) -> int:
+        count = self.indexed_count(wait=True)
+        return count if count is not None else sum(1 for _ in self)
+
+    def indexed_count(self, wait: bool = False) -> Optional[int]:
+        """Record count from the offset index, or None when there is no fresh index.
+
+        With ``wait`` a missing index is built now; otherwise it is built in
+        the background for the next run.
+        """
+        if self.index_dir is None or self.compressed:
+            return None
+        if self._index is None:
+            self._index = load_index(self.path, self.separator, self.index_dir, build=wait)
+        return None if self._index is None else len(self._index)
+
+    def read_indexed(self, positions: Iterable[int]) -> List[str]:
+        """Read records by position with one seek each; requires ``indexed_count()`` to have succeeded."""
+        spans = self._index.spans(positions)
+        records = {}
+        with open(self.path, 'rb') as f:
+            for span in sorted(set(spans)):
+                f.seek(span[0])
+                text = f.read(span[1] - span[0]).decode('utf-8')
+                if self.separator == "":
+                    records[span] = text.rstrip(',').strip()
+                else:
+                    records[span] = text.replace('\r\n', '\n').replace('\r', '\n').strip()
+        return [records[span] for span in spans]
+
+
+class FieldSource(FileSource):
+    """Records from one field of a JSONL, CSV/TSV or Parquet file.
+
+    Rows are streamed (Parquet in record batches of the one projected
+    column); rows without the field are skipped. Without a ``field``,
+    Parquet files use their first string column.
+    """
+
+    def __init__(self, path: str, separator: str, field: str = "", block_size: int = BLOCK_SIZE):
+        super().__init__(path, separator, None, block_size)
+        self.field = field
+        self.format = _strip_compression(path)
+
+    def _values(self) -> Iterator:
+        if self.format.endswith(PARQUET_EXTENSIONS):
+            return self._parquet_values()
+        if self.format.endswith(CSV_EXTENSIONS):
+            return self._csv_values()
+        return self._jsonl_values()
+
+    def _jsonl_values(self) -> Iterator:
+        f = self._open('r')
+        if f is None:
+            return
+        keys = self.field.split('.')
+        with f:
+            for number, line in enumerate(f, 1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    value = json.loads(line)
+                except ValueError as e:
+                    self._report(f"invalid JSON on line {number}: {e}")
+                    continue
+                for key in keys:
+                    value = value.get(key) if isinstance(value, dict) else None
+                yield value
+
+    def _csv_values(self) -> Iterator:
+        f = self._open('r', newline='')
+        if f is None:
+            return
+        with f:
+            reader = csv.reader(f, delimiter='\t' if self.format.endswith('.tsv') else ',')
+            header = next(reader, None)
+            if header is None:
+                return
+            if self.field in header:
+                column = header.index(self.field)
+            elif self.field.isdigit():
+                column = int(self.field)
+            else:
+                self._report(f"no column named {self.field!r}")
+                return
+            for row in reader:
+                if column < len(row):
+                    yield row[column]
+
+    def _parquet_values(self) -> Iterator:
+        try:
+            import pyarrow.parquet as pq
+        except ImportError:
+            self._report("reading .parquet files requires the pyarrow package (pip install pyarrow)")
+            return
+        try:
+            parquet = pq.ParquetFile(self.path)
+        except (OSError, ValueError) as e:
+            self._report(e)
+            return
+        column = self.field
+        if not column:
+            import pyarrow as pa
+            column = next((f.name for f in parquet.schema_arrow
+                           if pa.types.is_string(f.type) or pa.types.is_large_string(f.type)), None)
+        if column not in parquet.schema_arrow.names:
+            self._report(f"no column named {column!r}")
+            return
+        for batch in parquet.iter_batches(batch_size=8192, columns=[column]):
+            yield from batch.column(0).to_pylist()
+
+    def _records(self) -> Iterator[str]:
+        for value in self._values():
+            for item in (value if isinstance(value, list) else (value,)):
+                if isinstance(item, str):
+                    yield from split_and_clean(item, self.separator)
+
+    def iter_reversed(self, limit: Optional[int] = None) -> Iterator[str]:
+        return reversed(deque(self, maxlen=limit))
+
+    def indexed_count(self, wait: bool = False) -> Optional[int]:
+        return None
+
+
+def open_source(path: str, separator: str, field: str = "", index_dir: Optional[str] = None):
+    """Pick the reader for ``path``: a field reader for structured files, plain text otherwise.
+
+    Without a ``field``, ``.csv`` and ``.jsonl`` files keep being read as text.
+    """
+    kind = _strip_compression(path)
+    if kind.endswith(PARQUET_EXTENSIONS) or (field and kind.endswith(CSV_EXTENSIONS + JSONL_EXTENSIONS)):
+        return FieldSource(path, separator, field)
+    return FileSource(path, separator, index_dir)
+
+
+class RecordSet:
+    """Concatenation of record sources with bounded-memory selection helpers.
+
+    Per-source work (counting, index lookups, indexed reads) runs on up to
+    ``workers`` threads; results are always merged in source order. Indexes
+    missing during a streamed read are built by at most as many background
+    threads (see ``record_index``), and every thread reads in blocks of
+    ``BLOCK_SIZE``.
+    """
+
+    def __init__(self, sources: Sequence, workers: int = 1):
+        self.sources = list(sources)
+        self.workers = workers
+
+    def __iter__(self) -> Iterator[str]:
+        return chain.from_iterable(self.sources)
+
+    def iter_reversed(self, limit: Optional[int] = None) -> Iterator[str]:
+        return chain.from_iterable(source.iter_reversed(limit) for source in reversed(self.sources))
+
+    def _map(self, function, items) -> list:
+        items = list(items)
+        if self.workers <= 1 or len(items) <= 1:
+            return [function(item) for item in items]
+        with ThreadPoolExecutor(max_workers=min(self.workers, len(items)), thread_name_prefix="WildPromptorRecords") as pool:
+            return list(pool.map(function, items))
+
+    def count(self) -> int:
+        return sum(self._map(lambda source: source.count(), self.sources))
+
+    def indexed_counts(self, wait: bool = False) -> List[Optional[int]]:
+        return self._map(lambda source: source.indexed_count(wait), self.sources)
+
+    def take(self, skip: int, limit: Optional[int], reverse: bool = False) -> Tuple[List[str], int]:
+        """Return up to ``limit`` records after skipping ``skip`` (all remaining when None).
+
+        Indexed sources are skipped and read by offset; the others are
+        streamed. Sources are only looked at (and queued for indexing) once
+        the selection reaches them. Also returns how many records were passed
+        over, which is the total count whenever the window was not filled.
+        """
+        window = []
+        seen = 0
+        for source in (reversed(self.sources) if reverse else self.sources):
+            if limit is not None and len(window) >= limit:
+                break
+            wanted = None if limit is None else limit - len(window)
+            count = source.indexed_count()
+            if count is not None:
+                if skip >= count:
+                    skip -= count
+                    seen += count
+                    continue
+                taken = count - skip if wanted is None else min(count - skip, wanted)
+                positions = range(skip, skip + taken)
+                if reverse:
+                    positions = [count - 1 - position for position in positions]
+                window.extend(source.read_indexed(positions))
+                seen += skip + taken
+                skip = 0
+                continue
+            records = source.iter_reversed(None if wanted is None else skip + wanted) if reverse else iter(source)
+            for record in records:
+                if wanted is not None and len(window) >= limit:
+                    break
+                seen += 1
+                if skip:
+                    skip -= 1
+                    continue
+                window.append(record)
+        return window, seen
+
+    def fetch(self, indices: Iterable[int]) -> List[str]:
+        """Return the records at the given forward positions, in the requested order.
+
+        Uses the offset indexes when every source has one, else one streaming pass.
+        """
+        indices = list(indices)
+        counts = self.indexed_counts()
+        if None not in counts:
+            starts = list(accumulate(counts, initial=0))
+            by_source: Dict[int, List[int]] = {}
+            located = []
+            for index in indices:
+                source_number = bisect_right(starts, index) - 1
+                position = index - starts[source_number]
+                by_source.setdefault(source_number, []).append(position)
+                located.append((source_number, position))
+
+            def read(item):
+                source_number, positions = item
+                return source_number, positions, self.sources[source_number].read_indexed(positions)
+
+            found = {}
+            for source_number, positions, records in self._map(read, by_source.items()):
+                found.update(((source_number, position), record) for position, record in zip(positions, records))
+            return [found[key] for key in located]
+
+        wanted: Dict[int, Optional[str]] = dict.fromkeys(indices)
+        remaining = len(wanted)
+        if remaining:
+            for index, record in enumerate(self):
+                if index in wanted:
+                    wanted[index] = record
+                    remaining -= 1
+                    if not remaining:
+                        break
+        return [wanted[index] for index in indices]
+
+
+def select_offsets(available: int, batch_size: int, allow_duplicates: bool) -> List[int]:
+    """Offsets into the ``available`` candidates: cycle when duplicates are allowed, stop at the end otherwise."""
+    if available <= 0:
+        return []
+    if allow_duplicates:
+        return [i % available for i in range(batch_size)]
+    return list(range(min(batch_size, available)))
@@ -0,0 +1,53 @@
+from aiohttp import web
+
+from .instrument import stats
+from .options import OPTION_FIELDS, page_options
+from .store import get_store
+
+
+async def options_handler(request: web.Request) -> web.Response:
+    """GET /wildpromptor/options?folder=&name=&field=titles|lines&offset=&limit=&q="""
+    query = request.rel_url.query
+    folder = query.get("folder", "")
+    name = query.get("name", "")
+    field = query.get("field", "titles")
+    if field not in OPTION_FIELDS:
+        return web.json_response({"error": f"Unknown field: {field}"}, status=400)
+    try:
+        offset = int(query.get("offset", 0))
+        limit = int(query.get("limit", 100))
+    except ValueError:
+        return web.json_response({"error": "offset and limit must be integers"}, status=400)
+
+    store = get_store()
+    wordlist = store.resolve(folder, name) if folder in store.list_folders() else None
+    if wordlist is None:
+        return web.json_response({"error": f"Wordlist not found: {folder}/{name}"}, status=404)
+    return web.json_response(page_options(wordlist, field, offset, limit, query.get("q", "")))
+
+
+async def stats_handler(request: web.Request) -> web.Response:
+    """GET /wildpromptor/stats - counters, timing spans and cache hit rates."""
+    return web.json_response(stats())
+
+
+async def stats_reset_handler(request: web.Request) -> web.Response:
+    """POST /wildpromptor/stats/reset - return the statistics and clear them."""
+    return web.json_response(stats(reset=True))
+
+
+def add_routes(routes: web.RouteTableDef) -> None:
+    routes.get("/wildpromptor/options")(options_handler)
+    routes.get("/wildpromptor/stats")(stats_handler)
+    routes.post("/wildpromptor/stats/reset")(stats_reset_handler)
+
+
+def register_routes() -> bool:
+    """Attach the routes to the running ComfyUI server, if there is one."""
+    try:
+        from server import PromptServer
+        routes = PromptServer.instance.routes
+    except (ImportError, AttributeError):
+        return False
+    add_routes(routes)
+    return True
@@ -0,0 +1,202 @@
+import random
+from operator import itemgetter
+from typing import List, Sequence, Tuple, Union
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - ComfyUI always ships numpy
+    np = None
+
+RANDOM = "random"
+WEIGHTED = "weighted"
+ORDERED = "ordered"
+FIXED = "fixed"
+
+ORDERED_MODES = ["lockstep", "combinations"]
+ORDERED_MODE_TOOLTIP = (
+    "How 🔢ordered lists advance. lockstep: every ordered list steps together (entry i of each list). "
+    "combinations: walks every combination of the ordered lists, the last one changing fastest."
+)
+START_TOOLTIP = "Position of the first prompt among the ordered entries/combinations, to resume or split a sweep"
+
+SEED_MODES = ["legacy", "batched"]
+SEED_MODE_TOOLTIP = (
+    "legacy: draws one prompt at a time exactly like earlier versions, so old workflows reproduce for the same seed. "
+    "batched: draws each list for the whole batch at once (much faster for large batches, different prompts per seed)."
+)
+
+# A column is (RANDOM | ORDERED, options), (WEIGHTED, WeightedValues) or (FIXED, text).
+Column = Tuple[str, Union[Sequence[str], str]]
+
+
+_MASK64 = (1 << 64) - 1
+
+
+def _mix64(value: int) -> int:
+    """splitmix64 finalizer, used as the Feistel round function."""
+    value = (value + 0x9E3779B97F4A7C15) & _MASK64
+    value = ((value ^ (value >> 30)) * 0xBF58476D1CE4E5B9) & _MASK64
+    value = ((value ^ (value >> 27)) * 0x94D049BB133111EB) & _MASK64
+    return value ^ (value >> 31)
+
+
+class FeistelPermutation:
+    """Seeded pseudo-random permutation of ``range(size)`` evaluated per index.
+
+    A balanced Feistel network over the next even power of two, with cycle
+    walking back into range, so ``perm[i]`` costs O(1) and no table of
+    ``size`` entries is ever built. The same seed always gives the same order.
+    """
+    ROUNDS = 4
+
+    def __init__(self, size: int, seed: int):
+        self.size = size
+        bits = max(2, (size - 1).bit_length())
+        self._half = (bits + 1) // 2
+        self._mask = (1 << self._half) - 1
+        self._keys = [_mix64((seed & _MASK64) ^ _mix64(round_number)) for round_number in range(self.ROUNDS)]
+
+    def __len__(self):
+        return self.size
+
+    def _encrypt(self, value: int) -> int:
+        left, right = value >> self._half, value & self._mask
+        for key in self._keys:
+            left, right = right, left ^ (_mix64(right ^ key) & self._mask)
+        return (left << self._half) | right
+
+    def __getitem__(self, index: int) -> int:
+        if not 0 <= index < self.size:
+            raise IndexError("permutation index out of range")
+        value = self._encrypt(index)
+        while value >= self.size:
+            value = self._encrypt(value)
+        return value
+
+
+def _take(values: Sequence[str], indices) -> Sequence[str]:
+    if len(indices) == 1:
+        return (values[indices[0]],)
+    return itemgetter(*indices)(values)
+
+
+def _tile(values: Sequence[str], batch_size: int) -> Sequence[str]:
+    return tuple(values) * (batch_size // len(values) + 1)
+
+
+def _weighted_order(weights: Sequence[float], rng) -> List[int]:
+    """Weighted shuffle (Efraimidis-Spirakis keys ``u ** (1 / w)``) of the entries with a positive weight."""
+    if not any(w > 0 for w in weights):
+        weights = [1.0] * len(weights)
+    if np is not None:
+        w = np.asarray(weights, dtype=float)
+        positive = np.flatnonzero(w > 0)
+        keys = rng.random(len(positive)) ** (1.0 / w[positive])
+        return positive[np.argsort(-keys, kind="stable")].tolist()
+    positive = [i for i, w in enumerate(weights) if w > 0]
+    keys = {i: rng.random() ** (1.0 / weights[i]) for i in positive}
+    return sorted(positive, key=keys.__getitem__, reverse=True)
+
+
+def sample_legacy(columns: List[Column], batch_size: int, seed: int, allow_duplicates: bool = True) -> List[str]:
+    """Prompt-by-prompt sampling with the same RNG call order as the original nodes."""
+    rng = random.Random(seed)
+    prompts = []
+    for i in range(batch_size):
+        parts = []
+        for kind, values in columns:
+            if kind == RANDOM:
+                parts.append(rng.choice(values) if allow_duplicates else rng.sample(values, 1)[0])
+            elif kind == WEIGHTED:
+                parts.append(values[values.table.draw(rng)])
+            elif kind == ORDERED:
+                parts.append(values[i % len(values)])
+            else:
+                parts.append(values)
+        prompts.append(", ".join(parts))
+    return prompts
+
+
+def sample_batched(columns: List[Column], batch_size: int, seed: int, allow_duplicates: bool = True) -> List[str]:
+    """Draw every column for the whole batch at once, then join row-wise.
+
+    Uses ``numpy.random.default_rng(seed)`` when numpy is importable and
+    ``random.Random(seed)`` otherwise, so results are reproducible per seed
+    within one environment. With ``allow_duplicates=False`` each random column
+    walks a shuffled permutation and only repeats once it is exhausted;
+    weighted columns draw from their alias table, or walk a weighted shuffle.
+    """
+    rng = np.random.default_rng(seed) if np is not None else random.Random(seed)
+    drawn = []
+    for kind, values in columns:
+        if kind == FIXED:
+            drawn.append((values,) * batch_size)
+        elif kind == ORDERED:
+            drawn.append(_tile(values, batch_size)[:batch_size])
+        elif kind == WEIGHTED and not allow_duplicates:
+            drawn.append(_tile(_take(values, _weighted_order(values.weights, rng)), batch_size)[:batch_size])
+        elif kind == WEIGHTED:
+            drawn.append(_take(values, values.table.draws(rng, batch_size)))
+        elif not allow_duplicates:
+            if np is not None:
+                order = rng.permutation(len(values)).tolist()
+            else:
+                order = list(range(len(values)))
+                rng.shuffle(order)
+            drawn.append(_tile(_take(values, order), batch_size)[:batch_size])
+        elif np is not None:
+            drawn.append(_take(values, rng.integers(len(values), size=batch_size).tolist()))
+        else:
+            drawn.append(rng.choices(values, k=batch_size))
+    return [", ".join(parts) for parts in zip(*drawn)]
+
+
+class CartesianProduct:
+    """Mixed-radix view of the product of list sizes: combination ``k`` decodes in O(number of lists)."""
+
+    def __init__(self, sizes: Sequence[int]):
+        self.sizes = list(sizes)
+        self.total = 1
+        for size in self.sizes:
+            self.total *= size
+
+    def __len__(self):
+        return self.total
+
+    def decode(self, k: int) -> List[int]:
+        """Entry index per list for combination ``k`` (wrapping past the end), like ``itertools.product`` order."""
+        k %= self.total
+        digits = [0] * len(self.sizes)
+        for position in range(len(self.sizes) - 1, -1, -1):
+            k, digits[position] = divmod(k, self.sizes[position])
+        return digits
+
+
+def resolve_ordered(columns: List[Column], batch_size: int, ordered_mode: str = "lockstep",
+                    offset: int = 0) -> List[Column]:
+    """Replace each ORDERED column by the ``batch_size`` entries it contributes, starting at ``offset``."""
+    positions = [n for n, (kind, values) in enumerate(columns) if kind == ORDERED and len(values)]
+    if not positions or (ordered_mode == "lockstep" and offset == 0):
+        return columns
+    columns = list(columns)
+    if ordered_mode == "combinations":
+        product = CartesianProduct([len(columns[n][1]) for n in positions])
+        rows = [product.decode(offset + i) for i in range(batch_size)]
+        for digit, n in enumerate(positions):
+            values = columns[n][1]
+            columns[n] = (ORDERED, [values[row[digit]] for row in rows])
+    else:
+        for n in positions:
+            values = columns[n][1]
+            columns[n] = (ORDERED, [values[(offset + i) % len(values)] for i in range(batch_size)])
+    return columns
+
+
+def sample_prompts(columns: List[Column], batch_size: int, seed: int, seed_mode: str = "legacy",
+                   allow_duplicates: bool = True, ordered_mode: str = "lockstep", offset: int = 0) -> List[str]:
+    if not columns or batch_size <= 0:
+        return []
+    columns = resolve_ordered(columns, batch_size, ordered_mode, offset)
+    if seed_mode == "batched":
+        return sample_batched(columns, batch_size, seed, allow_duplicates)
+    return sample_legacy(columns, batch_size, seed, allow_duplicates)
@@ -0,0 +1,285 @@
+import os
+import json
+import threading
+from typing import Dict, List, Mapping, Optional, Sequence, Tuple
+
+from .instrument import configure, count, logger, span
+from .pack import Pack, compile_folder, pack_path_for
+from .weights import AliasTable, WeightedValues, strip_weights
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CONFIG_PATH = os.path.join(ROOT_DIR, 'config.json')
+
+_config = None
+_store = None
+_store_lock = threading.Lock()
+
+
+def load_config() -> Dict:
+    """Load config.json once per process."""
+    global _config
+    if _config is None:
+        with open(CONFIG_PATH, 'r') as f:
+            _config = json.load(f)
+        configure(_config)
+    return _config
+
+
+def clean_name(filename: str) -> str:
+    """Strip the extension and the ordering prefix ("1_1.Female.txt" -> "Female")."""
+    original_name = os.path.splitext(filename)[0]
+    return original_name.split('.', 1)[-1] if '.' in original_name else original_name
+
+
+def display_name(key: str) -> str:
+    """Strip the " [count]" suffix from a widget key ("Female [52]" -> "Female")."""
+    return key.rsplit(' [', 1)[0]
+
+
+def split_widget_key(key: str) -> Tuple[str, str]:
+    """Split an All-in-One widget key ("Subject - Female [52]") into (folder, name)."""
+    folder, file_info = key.split(' - ', 1)
+    return folder, display_name(file_info)
+
+
+class Wordlist:
+    """Parsed contents of one wordlist file.
+
+    ``lines`` holds the raw stripped lines, ``titles``/``contents`` the
+    ``title - content`` split used by the folder nodes and ``title_index``
+    maps each title to the content of its first occurrence. ``weights`` holds
+    the per-line ``:: weight`` values (suffix stripped from the lines), or
+    None when no line has one.
+    """
+    __slots__ = ("folder", "filename", "name", "path", "stamp", "lines", "titles", "contents", "title_index",
+                 "weights", "_alias", "_line_set")
+
+    def __init__(self, folder: str, filename: str, path: str, stamp: Optional[Tuple[int, int]],
+                 lines: Sequence[str], titles: Sequence[str], contents: Sequence[str], title_index: Mapping[str, str],
+                 weights: Optional[Sequence[float]] = None):
+        self.folder = folder
+        self.filename = filename
+        self.name = clean_name(filename)
+        self.path = path
+        self.stamp = stamp
+        self.lines = lines
+        self.titles = titles
+        self.contents = contents
+        self.title_index = title_index
+        self.weights = weights
+        self._alias = None
+        self._line_set = None
+
+    @classmethod
+    def from_lines(cls, folder: str, filename: str, path: str, stamp: Optional[Tuple[int, int]], lines: List[str]):
+        """Split raw lines; lines without a title share one string object in both arrays."""
+        lines, weights = strip_weights(lines)
+        titles = []
+        contents = []
+        for line in lines:
+            if ' - ' in line:
+                title, content = line.split(' - ', 1)
+                titles.append(title)
+                contents.append(content)
+            else:
+                titles.append(line)
+                contents.append(line)
+        titles = tuple(titles)
+        contents = tuple(contents)
+        title_index = dict(zip(reversed(titles), reversed(contents)))
+        return cls(folder, filename, path, stamp, tuple(lines), titles, contents, title_index, weights)
+
+    def __len__(self):
+        return len(self.lines)
+
+    def has_line(self, value: str) -> bool:
+        """``value in lines`` through a set built on first use."""
+        if self._line_set is None:
+            self._line_set = frozenset(self.lines)
+        return value in self._line_set
+
+    def weighted(self, field: str) -> Optional[WeightedValues]:
+        """``field`` ("lines" or "contents") with its alias table, or None for an unweighted list."""
+        if self.weights is None:
+            return None
+        if self._alias is None:
+            self._alias = AliasTable(self.weights)
+        return WeightedValues(getattr(self, field), self.weights, self._alias)
+
+
+def read_lines(path: str) -> List[str]:
+    with open(path, 'r', encoding='utf-8') as file:
+        return [line.strip() for line in file if line.strip()]
+
+
+class WordlistStore:
+    """Shared, lazily populated index of ``(folder, filename) -> Wordlist``.
+
+    Entries are parsed once and reused until the file's mtime or size changes;
+    folder listings are revalidated against the directory mtime. With a
+    ``pack_dir`` each folder is compiled into a binary pack on first use
+    and recompiled when any of its sources is newer than the pack; entries
+    are decoded from it into memory instead of parsing the text.
+    Callers that cache derived results key them on the entries' ``stamp``.
+    """
+
+    def __init__(self, data_path: str, pack_dir: Optional[str] = None):
+        self.data_path = data_path
+        self.pack_dir = pack_dir
+        self._lock = threading.RLock()
+        self._packs: Dict[str, Optional[Pack]] = {}
+        self._listings: Dict[str, Tuple[int, List[str], Dict[str, str]]] = {}
+        self._files: Dict[Tuple[str, str], Wordlist] = {}
+
+    def folder_path(self, folder: str) -> str:
+        return os.path.join(self.data_path, folder)
+
+    def list_folders(self) -> List[str]:
+        return [f for f in os.listdir(self.data_path)
+                if os.path.isdir(os.path.join(self.data_path, f)) and f != '__pycache__']
+
+    def _listing(self, folder: str) -> Tuple[List[str], Dict[str, str]]:
+        folder_path = self.folder_path(folder)
+        try:
+            mtime = os.stat(folder_path).st_mtime_ns
+        except OSError:
+            return [], {}
+        with self._lock:
+            cached = self._listings.get(folder)
+            if cached is not None and cached[0] == mtime:
+                return cached[1], cached[2]
+            file_names = [f for f in os.listdir(folder_path) if f.endswith('.txt')]
+            # Later files win on duplicate names, matching the widget dict built in INPUT_TYPES.
+            names = {clean_name(f): f for f in file_names}
+            self._listings[folder] = (mtime, file_names, names)
+            return file_names, names
+
+    def list_files(self, folder: str) -> List[str]:
+        return self._listing(folder)[0]
+
+    def find_file(self, folder: str, name: str) -> Optional[str]:
+        """Exact lookup of a display name ("Female") to its file name ("1_1.Female.txt")."""
+        return self._listing(folder)[1].get(name)
+
+    def resolve(self, folder: str, name: str) -> Optional[Wordlist]:
+        filename = self.find_file(folder, name)
+        return self.get(folder, filename) if filename is not None else None
+
+    def _stat(self, folder: str, filename: str) -> Optional[Tuple[int, int]]:
+        try:
+            st = os.stat(os.path.join(self.folder_path(folder), filename))
+        except OSError:
+            return None
+        return (st.st_mtime_ns, st.st_size)
+
+    def get(self, folder: str, filename: str) -> Wordlist:
+        stamp = self._stat(folder, filename)
+        cached = self._files.get((folder, filename))
+        if cached is not None and stamp is not None and cached.stamp == stamp:
+            return cached
+        return self._load(folder, filename, stamp)
+
+    def _load(self, folder: str, filename: str, stamp: Optional[Tuple[int, int]]) -> Wordlist:
+        key = (folder, filename)
+        file_path = os.path.join(self.folder_path(folder), filename)
+        with self._lock:
+            previous = self._files.get(key)
+            if previous is not None and stamp is not None and previous.stamp == stamp:
+                return previous
+            wordlist = self._from_pack(folder, filename, file_path, stamp)
+            if wordlist is None:
+                try:
+                    lines = read_lines(file_path)
+                    count("wordlist_files_read")
+                except FileNotFoundError:
+                    logger.warning("File not found: %s", file_path)
+                    lines, stamp = [], None
+                except Exception as e:
+                    logger.error("Error reading file %s: %s", file_path, e)
+                    lines, stamp = [], None
+                wordlist = Wordlist.from_lines(folder, filename, file_path, stamp, lines)
+            # Entries are immutable, so swapping the dict slot is the whole reload.
+            if stamp is not None:
+                self._files[key] = wordlist
+            else:
+                self._files.pop(key, None)
+        return wordlist
+
+    def reload(self, folder: str, filename: str) -> bool:
+        """Re-parse one loaded file if it changed on disk; returns True when the entry was swapped."""
+        cached = self._files.get((folder, filename))
+        if cached is None:
+            return False
+        stamp = self._stat(folder, filename)
+        if stamp is not None and cached.stamp == stamp:
+            return False
+        if stamp is None:
+            with self._lock:
+                return self._files.pop((folder, filename), None) is not None
+        self._load(folder, filename, stamp)
+        return True
+
+    def loaded(self) -> List[Tuple[str, str]]:
+        """(folder, filename) of every entry currently held in memory."""
+        with self._lock:
+            return list(self._files)
+
+    def _pack(self, folder: str, stamp: Tuple[int, int], filename: str) -> Optional[Pack]:
+        """Return a pack for ``folder`` that is fresh for ``filename``, compiling it if needed."""
+        pack = self._packs.get(folder)
+        if pack is not None and pack.is_fresh(filename, stamp):
+            return pack
+        pack_path = pack_path_for(self.pack_dir, folder)
+        on_disk = Pack.open(pack_path)
+        if on_disk is not None and on_disk.is_fresh(filename, stamp):
+            # Another process (or the CLI) already recompiled it.
+            pack = on_disk
+        else:
+            with span("wordlist.compile_folder"):
+                pack = compile_folder(self.folder_path(folder), pack_path, on_disk or pack, read_lines)
+            count("wordlist_packs_compiled")
+            if pack is None and os.path.isdir(self.folder_path(folder)):
+                # The pack could not be written (read-only install, bad cache_path); stop retrying per file.
+                logger.warning("Wordlist packs disabled, reading the text files instead")
+                self.pack_dir = None
+        self._packs[folder] = pack
+        return pack if pack is not None and pack.is_fresh(filename, stamp) else None
+
+    def _from_pack(self, folder: str, filename: str, file_path: str, stamp: Optional[Tuple[int, int]]):
+        if self.pack_dir is None or stamp is None:
+            return None
+        pack = self._pack(folder, stamp, filename)
+        arrays = pack.decode(filename) if pack is not None else None
+        if arrays is None:
+            return None
+        return Wordlist(folder, filename, file_path, stamp, *arrays)
+
+    def folder(self, folder: str) -> List[Wordlist]:
+        return [self.get(folder, filename) for filename in self.list_files(folder)]
+
+
+def default_pack_dir() -> str:
+    return os.path.join(ROOT_DIR, load_config().get('cache_path', 'cache'), 'wordlists')
+
+
+def get_store() -> WordlistStore:
+    """Return the process-wide store for the configured ``data_path``."""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                config = load_config()
+                pack_dir = default_pack_dir() if config.get('compiled_wordlists', True) else None
+                _store = WordlistStore(os.path.join(ROOT_DIR, config['data_path']), pack_dir)
+                if config.get('watch_wordlists', False):
+                    from .watcher import start_watcher
+                    start_watcher(_store, config.get('watch_interval', 2.0))
+    return _store
+
+
+def set_store(store: WordlistStore) -> WordlistStore:
+    """Replace the shared store, e.g. to point the nodes at another data tree."""
+    global _store
+    with _store_lock:
+        _store = store
+    return store
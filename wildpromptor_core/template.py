@@ -0,0 +1,220 @@
+"""Wildcard templates: ``a {Woman/Hairstyle} girl in {Location/all|2}, {day|night|{dawn|dusk}}``.
+
+* ``{Folder/name}`` draws one entry (the content after ``title - ``) from a
+  wordlist; ``{Folder/all}`` draws from every list in the folder. Folder and
+  list names are matched case-insensitively and ``:: weight`` lines are
+  honoured.
+* ``{Folder/name|3}`` draws three different entries, ``{Folder/name|1-3}``
+  one to three of them, joined with ", ".
+* ``{a|b|c}`` picks one alternative; alternatives are templates themselves,
+  so they can nest groups and wordlist references.
+* ``\\{``, ``\\}``, ``\\|`` and ``\\\\`` stand for the literal characters; an unescaped ``}``
+  outside a group is an error, like an unclosed ``{``.
+
+Templates are parsed once into a small tree cached by their text; wordlists
+are looked up when rendering, so edits to the lists are picked up.
+"""
+import re
+import heapq
+import random
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+from .cache import LRUCache
+from .instrument import logger, register_cache
+from .store import WordlistStore, clean_name
+from .weights import AliasTable, WeightedValues
+
+ALL_NAMES = ("all", "*")
+REFERENCE_PATTERN = re.compile(r'^\s*([^/{}|]+?)\s*/\s*([^/{}|]+?)\s*$')
+COUNT_PATTERN = re.compile(r'^\s*(\d+)(?:\s*-\s*(\d+))?\s*$')
+SPACES_PATTERN = re.compile(r'[ \t]{2,}')
+
+_compiled = LRUCache(256)
+register_cache("templates", _compiled)
+
+
+class TemplateError(ValueError):
+    """Raised for malformed templates (unbalanced braces)."""
+
+
+class Choice:
+    """``{a|b|c}``: one alternative, each a sequence of nodes."""
+    __slots__ = ("options",)
+
+    def __init__(self, options: List[list]):
+        self.options = options
+
+
+class Pick:
+    """``{Folder/name|low-high}``: ``low`` to ``high`` distinct wordlist entries."""
+    __slots__ = ("folder", "name", "low", "high")
+
+    def __init__(self, folder: str, name: str, low: int = 1, high: int = 1):
+        self.folder = folder
+        self.name = name
+        self.low = low
+        self.high = high
+
+
+Node = Union[str, Choice, Pick]
+
+
+def _parse_sequence(text: str, position: int, nested: bool) -> Tuple[List[Node], int]:
+    nodes: List[Node] = []
+    literal = []
+    while position < len(text):
+        char = text[position]
+        if char == '\\' and position + 1 < len(text) and text[position + 1] in '{}|\\':
+            literal.append(text[position + 1])
+            position += 2
+            continue
+        if char == '{':
+            if literal:
+                nodes.append(''.join(literal))
+                literal = []
+            group, position = _parse_group(text, position + 1)
+            nodes.append(group)
+            continue
+        if nested and char in '|}':
+            break
+        if char == '}':
+            raise TemplateError(f"Unmatched '}}' at position {position}: {text[max(0, position - 20):position + 20]!r}")
+        literal.append(char)
+        position += 1
+    if literal:
+        nodes.append(''.join(literal))
+    return nodes, position
+
+
+def _plain(nodes: List[Node]) -> Optional[str]:
+    if not nodes:
+        return ""
+    if len(nodes) == 1 and isinstance(nodes[0], str):
+        return nodes[0]
+    return None
+
+
+def _parse_group(text: str, position: int) -> Tuple[Node, int]:
+    start = position - 1
+    options = []
+    while True:
+        nodes, position = _parse_sequence(text, position, nested=True)
+        options.append(nodes)
+        if position >= len(text):
+            raise TemplateError(f"Unclosed '{{' at position {start}: {text[start:start + 40]!r}")
+        position += 1
+        if text[position - 1] == '}':
+            break
+
+    reference = REFERENCE_PATTERN.match(_plain(options[0]) or "")
+    if reference and len(options) <= 2:
+        count = COUNT_PATTERN.match(_plain(options[1]) or "") if len(options) == 2 else None
+        if len(options) == 1 or count:
+            low = high = 1
+            if count:
+                low = int(count.group(1))
+                high = int(count.group(2)) if count.group(2) else low
+            return Pick(reference.group(1), reference.group(2), min(low, high), max(low, high)), position
+    return Choice(options), position
+
+
+def compile_template(text: str) -> Tuple[Node, ...]:
+    """Parse ``text`` into nodes, reusing the cached tree for templates seen before."""
+    nodes = _compiled.get(text)
+    if nodes is None:
+        nodes = tuple(_parse_sequence(text, 0, nested=False)[0])
+        _compiled.put(text, nodes)
+    return nodes
+
+
+def iter_picks(nodes: Sequence[Node]):
+    """Every wordlist reference in the tree, in template order."""
+    for node in nodes:
+        if isinstance(node, Pick):
+            yield node
+        elif isinstance(node, Choice):
+            for option in node.options:
+                yield from iter_picks(option)
+
+
+def resolve_reference(store: WordlistStore, folder: str, name: str) -> List:
+    """Wordlists behind ``folder/name`` (every list of the folder for ``all``), matched case-insensitively."""
+    folders = {f.lower(): f for f in store.list_folders()}
+    folder = folders.get(folder.lower())
+    if folder is None:
+        return []
+    files = store.list_files(folder)
+    if name.lower() not in ALL_NAMES:
+        files = [f for f in files if clean_name(f).lower() == name.lower()][:1]
+    return [store.get(folder, filename) for filename in files]
+
+
+class TemplateRenderer:
+    """Renders compiled templates with one seeded RNG; wordlists are resolved once per renderer."""
+
+    def __init__(self, store: WordlistStore, rng: random.Random):
+        self.store = store
+        self.rng = rng
+        self._pools: Dict[Tuple[str, str], Tuple[Sequence[str], Optional[object]]] = {}
+
+    def _pool(self, pick: Pick):
+        key = (pick.folder.lower(), pick.name.lower())
+        pool = self._pools.get(key)
+        if pool is None:
+            wordlists = resolve_reference(self.store, pick.folder, pick.name)
+            if not wordlists:
+                logger.warning("Template wordlist not found: %s/%s", pick.folder, pick.name)
+                pool = ((), None)
+            elif len(wordlists) == 1:
+                pool = (wordlists[0].contents, wordlists[0].weighted("contents"))
+            else:
+                values = tuple(content for wordlist in wordlists for content in wordlist.contents)
+                weighted = None
+                if any(wordlist.weights is not None for wordlist in wordlists):
+                    weights = tuple(weight for wordlist in wordlists
+                                    for weight in (wordlist.weights or (1.0,) * len(wordlist)))
+                    weighted = WeightedValues(values, weights, AliasTable(weights))
+                pool = (values, weighted)
+            self._pools[key] = pool
+        return pool
+
+    def _draw(self, pick: Pick) -> str:
+        values, weighted = self._pool(pick)
+        if not values:
+            return ""
+        count = min(self.rng.randint(pick.low, pick.high), len(values))
+        if count <= 0:
+            return ""
+        if weighted is None:
+            if count == 1:
+                return values[self.rng.randrange(len(values))]
+            return ", ".join(values[i] for i in self.rng.sample(range(len(values)), count))
+        if count == 1:
+            return values[weighted.table.draw(self.rng)]
+        # Efraimidis-Spirakis keys u ** (1 / w) give distinct weighted picks in one pass;
+        # zero-weight lines get negative keys, so they only fill up what the others cannot.
+        rng = self.rng
+        keys = [(rng.random() ** (1.0 / weight) if weight > 0 else rng.random() - 1.0, i)
+                for i, weight in enumerate(weighted.weights)]
+        return ", ".join(values[i] for _, i in heapq.nlargest(count, keys))
+
+    def _render(self, nodes: Sequence[Node], out: List[str]) -> None:
+        for node in nodes:
+            if isinstance(node, str):
+                out.append(node)
+            elif isinstance(node, Pick):
+                out.append(self._draw(node))
+            else:
+                self._render(node.options[self.rng.randrange(len(node.options))], out)
+
+    def render(self, nodes: Sequence[Node]) -> str:
+        out: List[str] = []
+        self._render(nodes, out)
+        return SPACES_PATTERN.sub(' ', ''.join(out)).strip()
+
+
+def render_batch(text: str, store: WordlistStore, batch_size: int, seed: int) -> List[str]:
+    """Render ``batch_size`` prompts from one seed; the same seed gives the same batch."""
+    nodes = compile_template(text)
+    renderer = TemplateRenderer(store, random.Random(seed))
+    return [renderer.render(nodes) for _ in range(batch_size)]
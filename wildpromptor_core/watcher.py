@@ -0,0 +1,96 @@
+"""Background hot reload for the shared wordlist store.
+
+Uses ``watchdog`` (inotify on Linux) when it is installed and falls back to
+polling otherwise. Either way only wordlists that are already loaded and whose
+mtime/size changed are re-parsed; everything else is picked up lazily by the
+store on next access.
+"""
+import os
+import threading
+from typing import Optional, Set, Tuple
+
+try:
+    from watchdog.events import FileSystemEventHandler
+    from watchdog.observers import Observer
+except ImportError:
+    Observer = None
+
+from .instrument import logger
+from .store import WordlistStore
+
+
+class WordlistWatcher:
+    def __init__(self, store: WordlistStore, interval: float = 2.0, use_watchdog: bool = True):
+        self.store = store
+        self.interval = interval
+        self.use_watchdog = use_watchdog and Observer is not None
+        self._pending: Set[Tuple[str, str]] = set()
+        self._pending_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._observer = None
+
+    def poll(self) -> int:
+        """Reload every loaded wordlist that changed on disk; returns the number reloaded."""
+        return sum(self.store.reload(folder, filename) for folder, filename in self.store.loaded())
+
+    def flush(self) -> int:
+        """Reload the files reported by filesystem events since the last flush."""
+        with self._pending_lock:
+            pending, self._pending = self._pending, set()
+        return sum(self.store.reload(folder, filename) for folder, filename in pending)
+
+    def _on_path(self, path: str) -> None:
+        relative = os.path.relpath(path, self.store.data_path)
+        parts = relative.split(os.sep)
+        if len(parts) == 2 and parts[1].endswith('.txt'):
+            with self._pending_lock:
+                self._pending.add((parts[0], parts[1]))
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                self.flush() if self._observer is not None else self.poll()
+            except Exception as e:
+                logger.error("Error reloading wordlists: %s", e)
+
+    def start(self) -> "WordlistWatcher":
+        if self._thread is not None:
+            return self
+        if self.use_watchdog:
+            watcher = self
+
+            class Handler(FileSystemEventHandler):
+                def on_any_event(self, event):
+                    if not event.is_directory:
+                        watcher._on_path(event.src_path)
+                        if getattr(event, "dest_path", None):
+                            watcher._on_path(event.dest_path)
+
+            self._observer = Observer()
+            self._observer.schedule(Handler(), self.store.data_path, recursive=True)
+            self._observer.daemon = True
+            self._observer.start()
+        self._thread = threading.Thread(target=self._run, name="WildPromptorWatcher", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._observer is not None:
+            self._observer.stop()
+            self._observer = None
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+
+_watcher: Optional[WordlistWatcher] = None
+
+
+def start_watcher(store: WordlistStore, interval: float = 2.0) -> WordlistWatcher:
+    """Start (once) the process-wide watcher for ``store``."""
+    global _watcher
+    if _watcher is None:
+        _watcher = WordlistWatcher(store, interval).start()
+    return _watcher
@@ -0,0 +1,93 @@
+"""Optional per-line weights for wordlists.
+
+A line may end in ``:: <weight>`` (``title - content :: 3.0``); the suffix is
+stripped from the line and lines without one weigh 1. Weighted random draws
+use Walker's alias method: an O(n) table built once per file, then O(1) per
+draw however long the list is.
+"""
+import re
+from collections.abc import Sequence
+from typing import List, Optional, Tuple
+
+WEIGHT_PATTERN = re.compile(r'\s*::\s*(\d+(?:\.\d*)?|\.\d+)\s*$')
+
+
+def split_weight(line: str) -> Tuple[str, Optional[float]]:
+    """Split ``"text :: 2.5"`` into ``("text", 2.5)``; lines without a weight give ``(line, None)``."""
+    match = WEIGHT_PATTERN.search(line) if '::' in line else None
+    if match is None:
+        return line, None
+    return line[:match.start()], float(match.group(1))
+
+
+def strip_weights(lines: List[str]) -> Tuple[List[str], Optional[Tuple[float, ...]]]:
+    """Strip weight suffixes from all lines; weights are None when no line has one."""
+    stripped = []
+    weights = []
+    weighted = False
+    for line in lines:
+        line, weight = split_weight(line)
+        stripped.append(line)
+        weights.append(1.0 if weight is None else weight)
+        weighted = weighted or weight is not None
+    return (stripped, tuple(weights)) if weighted else (lines, None)
+
+
+class AliasTable:
+    """Walker/Vose alias table for drawing indices in proportion to ``weights``."""
+    __slots__ = ("probability", "alias", "_arrays")
+
+    def __init__(self, weights: Sequence):
+        count = len(weights)
+        total = float(sum(weights))
+        if total <= 0:
+            weights, total = [1.0] * count, float(count)
+        scaled = [weight * count / total for weight in weights]
+        probability = [1.0] * count
+        alias = list(range(count))
+        small = [i for i, p in enumerate(scaled) if p < 1.0]
+        large = [i for i, p in enumerate(scaled) if p >= 1.0]
+        while small and large:
+            less, more = small.pop(), large.pop()
+            probability[less] = scaled[less]
+            alias[less] = more
+            scaled[more] += scaled[less] - 1.0
+            (small if scaled[more] < 1.0 else large).append(more)
+        self.probability = probability
+        self.alias = alias
+        self._arrays = None
+
+    def __len__(self):
+        return len(self.alias)
+
+    def draw(self, rng) -> int:
+        """One index from a ``random.Random``-like generator."""
+        index = int(rng.random() * len(self.alias))
+        return index if rng.random() < self.probability[index] else self.alias[index]
+
+    def draws(self, rng, size: int):
+        """``size`` indices; vectorised for a numpy ``Generator``, looped for ``random.Random``."""
+        if hasattr(rng, "integers"):
+            import numpy as np
+            if self._arrays is None:
+                self._arrays = (np.asarray(self.probability), np.asarray(self.alias))
+            probability, alias = self._arrays
+            indices = rng.integers(len(alias), size=size)
+            return np.where(rng.random(size) < probability[indices], indices, alias[indices]).tolist()
+        return [self.draw(rng) for _ in range(size)]
+
+
+class WeightedValues(Sequence):
+    """A wordlist column together with the alias table of its line weights."""
+    __slots__ = ("values", "weights", "table")
+
+    def __init__(self, values: Sequence, weights: Sequence, table: AliasTable):
+        self.values = values
+        self.weights = weights
+        self.table = table
+
+    def __len__(self):
+        return len(self.values)
+
+    def __getitem__(self, index):
+        return self.values[index]